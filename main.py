@@ -1,4 +1,8 @@
+import multiprocessing
+
 from src.app import main
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Needed for the worker processes of the precompile sweep in frozen builds
+    multiprocessing.freeze_support()
+    main()
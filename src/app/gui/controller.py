@@ -3,7 +3,7 @@ from PyQt6.QtWidgets import QMessageBox, QProgressDialog, QFileDialog
 
 from .constants import YOUR_PHASES, ENEMY_PHASES, PRE_GAME_PHASE, PRE_ROUND_PHASE, ALWAYS_ACTIVE_KEYS
 from .config_reader import ConfigReader
-from src.data_loading.services import DownloadService
+from src.data_loading.services import DownloadService, ParsingService
 from .widgets.passive_ability_window import PassiveAbilitiesWindow
 from src.core.services import ListService, PDFService, AbilityService
 
@@ -39,11 +39,30 @@ class GUIController:
         self.passive_window = None
         self.data_dir = self.config_reader.get("data_dir")
         self.pdf_dir = self.config_reader.get("pdf_dir")
+        self.download_workers = self.config_reader.get("download_workers")
+        self.use_archive_download = self.config_reader.get("use_archive_download", False)
+        self.archive_source = self.config_reader.get("archive_source", "")
+        self.data_source = self.config_reader.get("data_source", {})
+        self.compress_data = self.config_reader.get("compress_data", False)
+        self.faction_cache = self.config_reader.get("faction_cache", {})
+        self.parallel_parsing = self.config_reader.get("parallel_parsing", True)
 
         if self.data_dir != "":
             self._update_data_dir()
         if self.pdf_dir != "":
             self._update_pdf_dir()
+        if self.download_workers:
+            self.download_service.change_max_workers(self.download_workers)
+        if self.use_archive_download:
+            self.download_service.change_archive_download(True, self.archive_source)
+        if self.data_source:
+            self._update_data_source()
+        if self.compress_data:
+            self.download_service.change_compression(True)
+        if self.faction_cache:
+            ParsingService.configure_faction_cache(**self.faction_cache)
+        if not self.parallel_parsing:
+            ParsingService.configure_parallel_parsing(False)
 
         self.connect_views()
 
@@ -85,7 +104,12 @@ class GUIController:
             self.main_window.initial_view.submission_label.setText(f"Error parsing input, please see the troubleshooting section in README ({e})")
             return
 
-        self.main_window.initial_view.submission_label.setText("Submission successful")
+        resolutions = self.list_service.get_list().name_resolutions
+        if resolutions:
+            resolved = ", ".join(f"'{resolution.requested}' as '{resolution.resolved}'" for resolution in resolutions)
+            self.main_window.initial_view.submission_label.setText(f"Submission successful, resolved {resolved}")
+        else:
+            self.main_window.initial_view.submission_label.setText("Submission successful")
         self.main_window.initial_view.create_pdf_button.setEnabled(True)
         self.main_window.initial_view.start_game_button.setEnabled(True)
         self.main_window.initial_view.show_all_button.setEnabled(True)
@@ -276,6 +300,16 @@ class GUIController:
         self.download_service.change_download_dir(self.data_dir)
         self.list_service.change_data_dir(self.data_dir)
 
+    def _update_data_source(self):
+        """
+        Helper to update the data source, falling back to GitHub if the configured source is invalid.
+        """
+        try:
+            self.download_service.change_data_source(self.data_source.get("type", ""), self.data_source.get("location"),
+                                                     self.data_source.get("has_tree", True), self.data_source.get("archive_url"))
+        except ValueError as e:
+            logger.error("Invalid data source %s in config, using GitHub instead. Error text: %s", self.data_source, str(e))
+
     def _update_pdf_dir(self):
         """
         Helper to update the PDF directory.
@@ -315,6 +349,8 @@ class GUIController:
 
         # Connect signals
         self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self._on_download_progress)
+        self.worker.precompile_progress.connect(self._on_precompile_progress)
         self.worker.finished.connect(self._on_download_finished)
         self.worker.error.connect(self._on_download_error)
 
@@ -327,6 +363,34 @@ class GUIController:
 
         self.thread.start()
 
+    def _on_download_progress(self, files_done, files_total, bytes_done, bytes_total):
+        """
+        Helper called when the download thread reports progress to update the progress dialog.
+        :param files_done: number of files finished
+        :param files_total: number of files to download
+        :param bytes_done: number of bytes received
+        :param bytes_total: number of bytes known to be downloaded so far
+        """
+        megabyte = 1024 * 1024
+
+        # Archive downloads do not know the number of files in advance, keep the progress bar indeterminate for them
+        self.progress.setRange(0, files_total)
+        self.progress.setValue(files_done)
+        if files_total:
+            self.progress.setLabelText(f"Downloaded {files_done}/{files_total} files ({bytes_done / megabyte:.1f}/{bytes_total / megabyte:.1f} MB)")
+        else:
+            self.progress.setLabelText(f"Downloaded {files_done} files ({bytes_done / megabyte:.1f} MB)")
+
+    def _on_precompile_progress(self, factions_done, factions_total):
+        """
+        Helper called when the download thread reports progress of parsing the downloaded factions to update the progress dialog.
+        :param factions_done: number of factions parsed
+        :param factions_total: number of factions to parse
+        """
+        self.progress.setRange(0, factions_total)
+        self.progress.setValue(factions_done)
+        self.progress.setLabelText(f"Preparing factions {factions_done}/{factions_total}")
+
     def _on_download_finished(self, message):
         """
         Helper called when the download thread is finished to display a message.
@@ -354,6 +418,8 @@ class DownloadWorker(QObject):
     """
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    progress = pyqtSignal(int, int, int, int)
+    precompile_progress = pyqtSignal(int, int)
 
     def __init__(self, download_service, mode="download"):
         """
@@ -371,14 +437,33 @@ class DownloadWorker(QObject):
         """
         try:
             if self.mode == "download":
-                self.download_service.download_all_files()
-                self.finished.emit("Successfully downloaded all data.")
+                self.download_service.download_all_files(self._emit_progress)
+                self.finished.emit(f"Successfully downloaded all data.{self._precompile()}")
             elif self.mode == "refresh":
-                self.download_service.refresh_all_files_present()
-                self.finished.emit("Successfully refreshed data.")
+                self.download_service.refresh_all_files_present(self._emit_progress)
+                self.finished.emit(f"Successfully refreshed data.{self._precompile()}")
             elif self.mode == "delete":
                 self.download_service.delete_all_files_present()
                 self.finished.emit("Successfully deleted data.")
         except Exception as e:
             logger.error("Encountered an error while performing a task in DownloadWorker. Task: %s, Error Text: %s", self.mode, str(e))
             self.error.emit(str(e))
+
+    def _precompile(self) -> str:
+        """
+        Helper to parse all downloaded factions ahead of time, so that broken catalogues are found now instead of at submit time.
+        :return: text to append to the finished message, naming the factions which failed to parse
+        """
+        report = self.download_service.precompile_all_factions(self.precompile_progress.emit)
+        if not report.failed:
+            return ""
+
+        failed = ", ".join(f"{result.faction} - {result.army_of_renown}" if result.army_of_renown else result.faction for result in report.failed)
+        return f" The following factions could not be parsed: {failed}"
+
+    def _emit_progress(self, progress):
+        """
+        Helper to forward a DownloadProgress from the download threads to the GUI thread.
+        :param progress: the DownloadProgress to forward
+        """
+        self.progress.emit(progress.files_done, progress.files_total, progress.bytes_done, progress.bytes_total)
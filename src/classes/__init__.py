@@ -1 +1,2 @@
-from .classes import Unit, Weapon, Ability, Faction, List
\ No newline at end of file
+from .classes import Unit, Weapon, Ability, Faction, List, RegimentOfRenown, NameResolution
+from .name_index import TrigramIndex
\ No newline at end of file
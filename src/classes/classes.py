@@ -1,11 +1,44 @@
-from dataclasses import dataclass, asdict
+from collections.abc import Sequence
+from dataclasses import dataclass, asdict, field, fields
+from functools import cached_property
 import json
 
+from .name_index import TrigramIndex, normalize_name, name_tokens
+
+
+class _CompactRecord:
+    """
+    Base for frozen dataclasses which are created in large numbers.
+    Subclasses declare their fields in __slots__, so instances have no __dict__, and cache their hash after the first use.
+    """
+    __slots__ = ("_hash",)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            # Not part of the pickled state, as string hashes differ between processes
+            value = hash(tuple(getattr(self, f.name) for f in fields(self)))
+            object.__setattr__(self, "_hash", value)
+            return value
+
+    def __getstate__(self):
+        return tuple(getattr(self, f.name) for f in fields(self))
+
+    def __setstate__(self, state):
+        # Frozen dataclasses reject setattr, so the state has to be restored like in __init__
+        for f, value in zip(fields(self), state):
+            object.__setattr__(self, f.name, value)
+
+
 @dataclass(frozen=True)
-class Ability:
+class Ability(_CompactRecord):
     """
     Represents an ability, has attributes name: str, type: str, timing: str | None, keywords: str | None, declare: str | None, effect: str, cost: str | None
     """
+    __slots__ = ("name", "type", "timing", "keywords", "declare", "effect", "cost")
+    __hash__ = _CompactRecord.__hash__  # Keeps dataclass from generating an uncached hash
+
     name: str
     type: str
     timing: str | None
@@ -70,10 +103,13 @@ class Ability:
         return self.keywords.replace("^^", "").replace("**", "")
 
 @dataclass(frozen=True)
-class Weapon:
+class Weapon(_CompactRecord):
     """
     Represents a Weapon profile, has attributes: name: str, type: str, range: str | None, attacks: str, hit: str, wound: str, rend: str, damage: str, keywords: str | None
     """
+    __slots__ = ("name", "type", "range", "attacks", "hit", "wound", "rend", "damage", "keywords")
+    __hash__ = _CompactRecord.__hash__
+
     name: str
     type: str
     range: str | None
@@ -92,10 +128,14 @@ class Weapon:
 
 
 @dataclass(frozen=True)
-class Unit:
+class Unit(_CompactRecord):
     """
-    Represents a unit profile, has attributes: name: str, move: str, health: str, control: str | None, banishment: str | None, save: str, keywords: str | None, weapons: list[Weapon], abilities: list[Ability]
+    Represents a unit profile, has attributes: name: str, move: str, health: str, control: str | None, banishment: str | None, save: str, keywords: str | None, weapons: tuple[Weapon, ...], abilities: tuple[Ability, ...]
+    Characteristics and keywords are None and weapons are empty if the unit was parsed with a projection leaving them out.
     """
+    __slots__ = ("name", "move", "health", "control", "banishment", "save", "keywords", "weapons", "abilities")
+    __hash__ = _CompactRecord.__hash__
+
     name: str
     move: str
     health: str
@@ -103,8 +143,28 @@ class Unit:
     banishment: str | None
     save: str
     keywords: str | None
-    weapons: list[Weapon]
+    weapons: tuple[Weapon, ...]  # Lists passed in are converted to tuples
+    abilities: tuple[Ability, ...]
+
+    def __post_init__(self):
+        object.__setattr__(self, "weapons", tuple(self.weapons))
+        object.__setattr__(self, "abilities", tuple(self.abilities))
+
+    def to_json(self):
+        """
+        Parses self to JSON
+        """
+        return json.dumps(asdict(self))
+
+
+@dataclass(frozen=True)
+class RegimentOfRenown:
+    """
+    Represents a regiment of renown, has attributes: name: str, abilities: list[Ability], units: list[Unit]
+    """
+    name: str
     abilities: list[Ability]
+    units: list[Unit]
 
     def to_json(self):
         """
@@ -116,14 +176,127 @@ class Unit:
 @dataclass(frozen=True)
 class Faction:
     """
-    Represents a faction, has attributes: name: str, battle_traits: list[Ability], battle_formations: dict[str,Ability] | None, enhancements_available: dict[str,list[Ability]], lores_available: dict[str,list[Ability]], units: list[Unit]
+    Represents a faction, has attributes: name: str, battle_traits: list[Ability], battle_formations: dict[str,Ability] | None, enhancements_available: dict[str,list[Ability]], lores_available: dict[str,list[Ability]], units: Sequence[Unit], regiments_of_renown: dict[str,RegimentOfRenown]
     """
     name: str
     battle_traits: list[Ability]
     battle_formations: dict[str,Ability] | None
     enhancements_available: dict[str,list[Ability]]
     lores_available: dict[str,list[Ability]]
-    units: list[Unit]
+    units: Sequence[Unit] # May be a lazily built sequence which provides find(name)
+    regiments_of_renown: dict[str, RegimentOfRenown] = field(default_factory=dict)
+
+    def __getstate__(self):
+        # The lookup tables are rebuilt when needed instead of being pickled with the faction
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def find_units(self, name: str) -> list[Unit]:
+        """
+        Get the units with the given name, ignoring case and whitespace, only building those units if the units are loaded lazily
+        :param name: the name of the units
+        :return: list of matching units in the order of the faction
+        """
+        return [self.units[idx] for idx in self._units_by_name.get(normalize_name(name), [])]
+
+    def find_enhancements(self, name: str) -> list[Ability]:
+        """
+        Get the enhancements with the given name from all enhancement tables
+        :param name: the name of the enhancement
+        :return: list of matching enhancements in the order of the tables
+        """
+        return list(self._enhancements_by_name.get(name, []))
+
+    def find_lores(self, names: list[str]) -> dict[str, list[Ability]]:
+        """
+        Get the lores all of whose words are contained in one of the given names, e.g. as written in a list
+        :param names: the lore names to match
+        :return: dict with the names of the matching lores as keys and their abilities as values, in the order of the faction
+        """
+        matches = set()
+        for name in names:
+            # A lore matches if every one of its tokens is found, i.e. if it is counted once per token
+            counts = {}
+            for token in name_tokens(name):
+                for idx in self._lores_by_token.get(token, []):
+                    counts[idx] = counts.get(idx, 0) + 1
+            matches.update(idx for idx, count in counts.items() if count == self._lore_names[idx][1])
+
+        return {self._lore_names[idx][0]: self.lores_available[self._lore_names[idx][0]] for idx in sorted(matches)}
+
+    def match_unit_name(self, name: str, threshold: float) -> tuple[str, float] | None:
+        """
+        Find the unit name most similar to a name which is not found as is, e.g. because of different punctuation or prefixes
+        :param name: the name to match
+        :param threshold: the minimum similarity between 0 and 1
+        :return: tuple of the unit name and its similarity, None if no unit name is similar enough
+        """
+        return self._unit_trigrams.best_match(name, threshold)
+
+    def match_enhancement_name(self, name: str, threshold: float) -> tuple[str, float] | None:
+        """
+        Find the enhancement name most similar to a name which is not found as is
+        :param name: the name to match
+        :param threshold: the minimum similarity between 0 and 1
+        :return: tuple of the enhancement name and its similarity, None if no enhancement name is similar enough
+        """
+        return self._enhancement_trigrams.best_match(name, threshold)
+
+    @cached_property
+    def _units_by_name(self) -> dict[str, list[int]]:
+        """
+        Index of the positions of the units by normalized name, built from the names only if the units are loaded lazily
+        """
+        names = self.units.names if hasattr(self.units, "names") else [unit.name for unit in self.units]
+        index = {}
+        for idx, name in enumerate(names):
+            index.setdefault(normalize_name(name), []).append(idx)
+
+        return index
+
+    @cached_property
+    def _enhancements_by_name(self) -> dict[str, list[Ability]]:
+        """
+        Index of the enhancements of all tables by name
+        """
+        index = {}
+        for enhancements in self.enhancements_available.values():
+            for enhancement in enhancements:
+                index.setdefault(enhancement.name, []).append(enhancement)
+
+        return index
+
+    @cached_property
+    def _unit_trigrams(self) -> TrigramIndex:
+        """
+        Trigram index of the unit names for fuzzy matching
+        """
+        return TrigramIndex(self.units.names if hasattr(self.units, "names") else [unit.name for unit in self.units])
+
+    @cached_property
+    def _enhancement_trigrams(self) -> TrigramIndex:
+        """
+        Trigram index of the enhancement names for fuzzy matching
+        """
+        return TrigramIndex(self._enhancements_by_name)
+
+    @cached_property
+    def _lore_names(self) -> list[tuple[str, int]]:
+        """
+        Names of the lores and their number of distinct tokens, in the order of lores_available
+        """
+        return [(lore, len(name_tokens(lore))) for lore in self.lores_available]
+
+    @cached_property
+    def _lores_by_token(self) -> dict[str, list[int]]:
+        """
+        Inverted index of the positions of the lores in lores_available by the tokens of their names
+        """
+        index = {}
+        for idx, lore in enumerate(self.lores_available):
+            for token in name_tokens(lore):
+                index.setdefault(token, []).append(idx)
+
+        return index
 
     def to_json(self):
         """
@@ -147,16 +320,34 @@ class Faction:
                 for lore, spells in self.lores_available.items()
 
             },
-            "units": [asdict(unit) for unit in self.units]
+            "units": [asdict(unit) for unit in self.units],
+            "regiments_of_renown": {name: asdict(regiment) for name, regiment in self.regiments_of_renown.items()}
         }
 
         return json.dumps(fac_dict)
 
 
+@dataclass(frozen=True)
+class NameResolution:
+    """
+    Represents a name of a list which was not found as is and was resolved to a similar name, has attributes: kind: str, requested: str, resolved: str, score: float
+    """
+    kind: str  # "unit" or "enhancement"
+    requested: str
+    resolved: str
+    score: float
+
+    def to_json(self):
+        """
+        Parses self to JSON
+        """
+        return json.dumps(asdict(self))
+
+
 @dataclass(frozen=True)
 class List:
     """
-    Represents an army list, has attributes: name: str battle_tactics: list[str] | None, faction: str, battle_traits: list[Ability], battle_formation: tuple[str,Ability] | None, enhancements: dict[str, list[Ability | str]], lores: dict[str,list[Ability]], units: list[Unit]
+    Represents an army list, has attributes: name: str battle_tactics: list[str] | None, faction: str, battle_traits: list[Ability], battle_formation: tuple[str,Ability] | None, enhancements: dict[str, list[Ability | str]], lores: dict[str,list[Ability]], units: list[Unit], regiments_of_renown: list[RegimentOfRenown], name_resolutions: list[NameResolution]
     """
     name: str
     battle_tactics: list[str] | None
@@ -166,6 +357,8 @@ class List:
     enhancements: dict[str, list[Ability | str]] # Also contains if a unit has been reinforced
     lores: dict[str,list[Ability]]
     units: list[Unit]
+    regiments_of_renown: list[RegimentOfRenown] = field(default_factory=list)
+    name_resolutions: list[NameResolution] = field(default_factory=list)  # Names which were only found by similarity
 
     def to_json(self):
         """
@@ -191,7 +384,10 @@ class List:
                 for lore, spells in self.lores.items()
 
             },
-            "units": [asdict(unit) for unit in self.units]
+            "units": [asdict(unit) for unit in self.units],
+            "regiments_of_renown": [asdict(regiment) for regiment in self.regiments_of_renown],
+            "name_resolutions": [asdict(resolution) for resolution in self.name_resolutions]
         }
 
         return json.dumps(fac_dict)
+
@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from collections.abc import Iterable
+from itertools import chain
+
+_NAME_TOKEN_PATTERN = re.compile(r"[\w']+")
+_NON_ALPHANUMERIC_PATTERN = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a name for lookups, ignoring case and repeated whitespace.
+    :param name: the name to normalize
+    :return: the normalized name
+    """
+    return " ".join(name.casefold().split())
+
+
+def name_tokens(name: str) -> frozenset[str]:
+    """
+    Gets the normalized words of a name, ignoring case and punctuation.
+    :param name: the name to split
+    :return: set of the words
+    """
+    return frozenset(_NAME_TOKEN_PATTERN.findall(name.casefold()))
+
+
+class TrigramIndex:
+    """
+    Index of names by the character trigrams of their normalized form, to find the most similar name without comparing against every name.
+    Similarity is the Dice coefficient of the trigram sets, i.e. 1.0 for names differing only in case and punctuation.
+    """
+    def __init__(self, names: Iterable[str]):
+        """
+        Constructor.
+        :param names: the names to index, duplicates are indexed once
+        """
+        self._names = list(dict.fromkeys(names))
+        self._trigram_counts = []
+        self._names_by_trigram: dict[str, list[int]] = {}
+
+        for idx, name in enumerate(self._names):
+            trigrams = _trigrams(name)
+            self._trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self._names_by_trigram.setdefault(trigram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def best_match(self, name: str, threshold: float) -> tuple[str, float] | None:
+        """
+        Finds the indexed name most similar to a name, preferring names indexed first if scores are equal.
+        :param name: the name to look up
+        :param threshold: the minimum similarity between 0 and 1
+        :return: tuple of the indexed name and its similarity, None if no name is similar enough
+        """
+        trigrams = _trigrams(name)
+        if not trigrams:
+            return None
+
+        # Only names sharing at least one trigram are scored
+        shared = Counter(chain.from_iterable(self._names_by_trigram.get(trigram, ()) for trigram in trigrams))
+
+        best_idx, best_score = None, 0.0
+        for idx, count in shared.items():
+            score = 2 * count / (len(trigrams) + self._trigram_counts[idx])
+            if score > best_score or (score == best_score and best_idx is not None and idx < best_idx):
+                best_idx, best_score = idx, score
+
+        if best_idx is None or best_score < threshold:
+            return None
+
+        return self._names[best_idx], best_score
+
+
+def _trigrams(name: str) -> set[str]:
+    """
+    Helper to get the trigrams of a name, padded so that short words and word boundaries are represented.
+    """
+    normalized = " ".join(_NON_ALPHANUMERIC_PATTERN.sub(" ", name.casefold()).split())
+    if not normalized:
+        return set()
+
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -108,6 +108,13 @@ def get_abilities_with_sources(army_list: List) -> list[AbilityWithSource]:
         for unit_ability in unit.abilities:
             abilities.append(AbilityWithSource(unit_ability, f"{unit.name}"))
 
+    for regiment in army_list.regiments_of_renown:
+        for regiment_ability in regiment.abilities:
+            abilities.append(AbilityWithSource(regiment_ability, f"Regiment of Renown: {regiment.name}"))
+        for unit in regiment.units:
+            for unit_ability in unit.abilities:
+                abilities.append(AbilityWithSource(unit_ability, f"{unit.name}"))
+
     return abilities
 
 
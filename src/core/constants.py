@@ -56,4 +56,6 @@ ALL_PHASES = [
     "Any Charge Phase",
     "Any Combat Phase",
     "End of Any Turn"]
-DEFAULT_TIMING = "Reaction"
\ No newline at end of file
+DEFAULT_TIMING = "Reaction"
+NAME_MATCH_THRESHOLD = 0.7  # Minimum trigram similarity for resolving unit and enhancement names not found as is
+UNIT_MODIFIERS = ["General", "Reinforced"]  # Listed like enhancements, but are no enhancements
\ No newline at end of file
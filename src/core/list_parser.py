@@ -1,13 +1,62 @@
 import re
+from functools import lru_cache
 from anyascii import anyascii
 
 from src.data_loading.services import ParsingService
-from src.classes import List, Faction
+from src.data_loading.constants import PROJECTION_ABILITIES, NON_ASCII_CACHE_SIZE
+from src.classes import List, Faction, NameResolution
+from src.classes.name_index import name_tokens
+from .constants import NAME_MATCH_THRESHOLD, UNIT_MODIFIERS
 
 from src.logging_config import get_logger_for_package
 
 logger = get_logger_for_package(__package__.split('.')[-1])
 
+_FIELD_SEPARATOR = "\n"
+_ALT_FACTION_SEPARATOR = "|"
+_BULLET_POINT = chr(8226)
+_INSERT_AFTER_TOKEN = "pts"
+_ALTERNATE_WARSCROLL_IDENT = "Scourge of Ghyran"  # Units with alternate warscrolls are listed with both names
+# Newlines are inserted before the first occurrence of each token, in this order
+_INSERT_BEFORE_TOKENS = [
+    "General's",
+    "Drops",
+    "Spell ",
+    "Prayer ",
+    "Manifestation ",
+    "Battle Tactic ",
+    "Regiment ",
+    "Faction Terrain",
+    "Created "
+]
+_REDUNDANT_LINE_TOKENS = [
+    "General's",
+    "Drops",
+    "Regiment",
+    "Faction Terrain",
+    "App",
+    "Created",
+    "Data",
+    "Version",
+    "Auxiliaries",
+    "Wounds",
+    "----",
+    "Orruk Warclans"  # Temp fix as they are the only faction with split battletome
+]
+
+_BULLET_POINT_PATTERN = re.compile(rf"\s*{_BULLET_POINT}\s*")
+_NON_ASCII_PATTERN = re.compile(r"[^\x00-\x7f]+")
+# Matches every place where a newline may be inserted, so the text is scanned once for all tokens
+_FIELD_BREAK_PATTERN = re.compile(
+    rf"(?P<after>{re.escape(_INSERT_AFTER_TOKEN)})\s*"
+    rf"|(?P<before>{'|'.join(re.escape(token) for token in _INSERT_BEFORE_TOKENS)})"
+)
+_REDUNDANT_LINE_PATTERN = re.compile("|".join(re.escape(token) for token in _REDUNDANT_LINE_TOKENS))
+_ROR_PATTERN = re.compile(r"Regiments? of Renown")  # Regiments of Renown are needed even though they contain a redundant token
+_POINTS_PATTERN = re.compile(r"\s*\(\s*[-+]?\d+\s*\)\s*")
+_POINTS_TEXT_PATTERN = re.compile(r"\s+Points")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
 
 def parse_list(army_list: str, data_dir: str | None = None) -> List:
     """
@@ -16,30 +65,39 @@ def parse_list(army_list: str, data_dir: str | None = None) -> List:
     :param data_dir: The data directory where the data is located, if it is None, uses the default data_dir of the used ParsingService. (Optional, defaults to None)
     :return: List object representing the parsed data.
     """
-    list_dict = get_list_as_dict(army_list)
+    return parse_list_dict(get_list_as_dict(army_list), data_dir)
+
+
+def parse_list_dict(list_dict: dict[str, list[str] | str | None], data_dir: str | None = None) -> List:
+    """
+    Method for building the List object of an army list already parsed into a dictionary, using data located at data_dir.
+    :param list_dict: The army list as returned by get_list_as_dict.
+    :param data_dir: The data directory where the data is located, if it is None, uses the default data_dir of the used ParsingService. (Optional, defaults to None)
+    :return: List object representing the parsed data.
+    """
     parser = ParsingService()
+    # Only the abilities of the units named in the list are needed
+    parser.change_unit_loading(lazy=True)
+    parser.change_projection(PROJECTION_ABILITIES)
     if data_dir:
         parser.change_data_location(data_dir)
 
     parser.load_faction(list_dict["faction"])
     parser.load_army_of_renown(list_dict["army_of_renown"])
+    parser.load_regiments_of_renown(list_dict["regiments_of_renown"])
     faction = parser.get_faction()
 
     battle_formation = (list_dict["battle_formation"], faction.battle_formations[list_dict["battle_formation"]]) \
         if faction.battle_formations and list_dict["battle_formation"] else None
-    enhancements = get_enhancement_unit_dict(list_dict["units"], faction)
-
-    lores_in_list = {_get_lore_name_without_ident(lore): lore for lore in list_dict["lores"]}
-    lores_in_faction = {_get_lore_name_without_ident(lore): lore for lore in faction.lores_available}
+    # Names which are only found by similarity are reported, so they can be shown to the user
+    name_resolutions = []
+    enhancements = get_enhancement_unit_dict(list_dict["units"], faction, resolutions=name_resolutions)
 
-    # Some Armies of Renown have different names in the official App than the dataset (The Knights of New Summercourt vs New Summercourt)
-    lores = {}
-    for faction_lore_no_ident, lore_name in lores_in_faction.items():
-        for list_lore_no_ident in lores_in_list:
-            if all(word in list_lore_no_ident for word in faction_lore_no_ident.split(" ")):
-                lores[lore_name] = faction.lores_available[lore_name]
+    # Some Armies of Renown have different names in the official App than the dataset (The Knights of New Summercourt vs New Summercourt),
+    # so lores are matched by the words of their names
+    lores = faction.find_lores(list_dict["lores"])
 
-    units = get_unit_objects(list_dict["units"], faction)
+    units = get_unit_objects(list_dict["units"], faction, resolutions=name_resolutions)
 
     list_obj = List(
         list_dict["name"],
@@ -49,7 +107,9 @@ def parse_list(army_list: str, data_dir: str | None = None) -> List:
         battle_formation,
         enhancements,
         lores,
-        units
+        units,
+        list(faction.regiments_of_renown.values()),
+        name_resolutions
     )
 
     logger.debug("Created list object %s", list_obj.to_json())
@@ -57,30 +117,44 @@ def parse_list(army_list: str, data_dir: str | None = None) -> List:
     return list_obj
 
 
-def get_unit_objects(units: list[str], faction: Faction, sep: str = " & ") -> list:
+def get_unit_objects(units: list[str], faction: Faction, sep: str = " & ", resolutions: list[NameResolution] | None = None) -> list:
     """
     Extracts the Unit objects for the given unit names from a faction object.
+    Names not found as is are resolved to the most similar unit name. Of the two entries of an alternate warscroll (see get_list_as_dict),
+    only one is resolved, and only if neither is found as is.
     :param units: list of unit names.
     :param faction: faction object containing the unit objects.
     :param sep: the separator between the unit names (Optional, defaults to " & ").
+    :param resolutions: list to which the names resolved by similarity are appended (Optional, defaults to None)
     :return: list of unit objects.
     """
-    unit_objs = []
+    unit_names = [unit.split(sep)[0] for unit in units]
+    found = [faction.find_units(name) for name in unit_names]
+    # The entry with the original name directly follows the entry with the corrected name and has the same words
+    is_alternate = [
+        idx > 0 and unit.startswith(_ALTERNATE_WARSCROLL_IDENT) and name_tokens(units[idx - 1]) == name_tokens(unit)
+        for idx, unit in enumerate(units)
+    ]
 
-    for unit in units:
-        unit_objs.extend(list(filter(
-            lambda u: u.name == unit.split(sep)[0],
-            faction.units)))
+    unit_objs = []
+    for idx, name in enumerate(unit_names):
+        if not found[idx]:
+            found_as_pair = (is_alternate[idx] and found[idx - 1]) or (idx + 1 < len(units) and is_alternate[idx + 1] and found[idx + 1])
+            if not found_as_pair:
+                found[idx] = _resolve_name(name, "unit", faction.match_unit_name, faction.find_units, resolutions)
+        unit_objs.extend(found[idx])
 
     return unit_objs
 
 
-def get_enhancement_unit_dict(units_with_enhancements: list[str], faction: Faction, sep: str = " & ") -> dict[str, list]:
+def get_enhancement_unit_dict(units_with_enhancements: list[str], faction: Faction, sep: str = " & ", resolutions: list[NameResolution] | None = None) -> dict[str, list]:
     """
     Extracts which unit has which enhancement from a list of unit names with enhancement names
+    Enhancement names not found as is are resolved to the most similar enhancement name.
     :param units_with_enhancements: list of unit names with enhancements, separated by sep.
     :param faction: faction object containing the ability objects representing the enhancements.
     :param sep: the separator between the unit names (Optional, defaults to " & ").
+    :param resolutions: list to which the names resolved by similarity are appended (Optional, defaults to None)
     :return: dict with unit names as keys and lists of enhancement abilities as values.
     """
     unit_enhancement_dict = {}
@@ -95,24 +169,45 @@ def get_enhancement_unit_dict(units_with_enhancements: list[str], faction: Facti
 
         enhancements = []
         for enhancement in enhancement_names:
-            for _, abilities in faction.enhancements_available.items():
-                enhancements.extend(list(filter(
-                    lambda a: a.name == enhancement,
-                    abilities
-                )))
+            found = faction.find_enhancements(enhancement)
+            if not found and enhancement not in UNIT_MODIFIERS:
+                found = _resolve_name(enhancement, "enhancement", faction.match_enhancement_name, faction.find_enhancements, resolutions)
+            enhancements.extend(found)
 
         unit_enhancement_dict[unit] = enhancements
 
     return unit_enhancement_dict
 
 
+def _resolve_name(name: str, kind: str, match, find, resolutions: list[NameResolution] | None) -> list:
+    """
+    Helper to look up the most similar name to a name which was not found as is, recording the resolution.
+    :param name: the name which was not found
+    :param kind: the kind of the name, "unit" or "enhancement"
+    :param match: the faction method finding the most similar name
+    :param find: the faction method finding the objects of a name
+    :param resolutions: list to which the resolution is appended, may be None
+    :return: list of the objects of the most similar name, empty if no name is similar enough
+    """
+    match_result = match(name, NAME_MATCH_THRESHOLD)
+    if match_result is None:
+        logger.warning("Could not find %s %s", kind, name)
+        return []
+
+    resolved, score = match_result
+    logger.info("Resolved %s %s as %s (similarity %.2f)", kind, name, resolved, score)
+    if resolutions is not None:
+        resolutions.append(NameResolution(kind, name, resolved, round(score, 3)))
+
+    return find(resolved)
+
+
 def get_list_as_dict(army_list: str) -> dict[str, list[str] | str | None]:
     """
     Parses a string army list into a dictionary.
     :param army_list: the text of the army list.
-    :return: dict containing the respective fields in format {name: str, faction: str, army_of_renown: str | None, battle_formation: str, lores: list[str], battle_tactics: list[str], units: list[str]}.
+    :return: dict containing the respective fields in format {name: str, faction: str, army_of_renown: str | None, battle_formation: str, lores: list[str], battle_tactics: list[str], units: list[str], regiments_of_renown: list[str]}.
     """
-    soggy_ident = "Scourge of Ghyran"
     aor_ident = "Army of Renown"
     aor_splitter = " - "
     lore_ident = "Lore "
@@ -125,11 +220,11 @@ def get_list_as_dict(army_list: str) -> dict[str, list[str] | str | None]:
         "battle_formation": None,
         "lores": [],
         "battle_tactics": [],
-        "units": []
+        "units": [],
+        "regiments_of_renown": []
     }
 
-    cleaned_list = _remove_redundant_fields(_norm_list_text(army_list))
-    lines = cleaned_list.splitlines()
+    lines = _get_list_lines(army_list)
 
     list_dict["name"] = lines[0]
 
@@ -147,28 +242,38 @@ def get_list_as_dict(army_list: str) -> dict[str, list[str] | str | None]:
     else:
         list_dict["faction"] = lines[1]
 
-        if not lines[2].startswith(tactics_ident) and not lore_ident in lines[2]:
+        if not lines[2].startswith(tactics_ident) and not lore_ident in lines[2] and not _ROR_PATTERN.search(lines[2]):
             list_dict["battle_formation"] = lines[2]
             iter_start_idx = 3
         else:
             iter_start_idx = 2
 
-    for i in range(iter_start_idx, len(lines)):
+    i = iter_start_idx
+    while i < len(lines):
         line = lines[i]
-
-        if line.startswith(tactics_ident):
+        i += 1
+
+        if ror_match := _ROR_PATTERN.search(line):
+            # The regiment name either follows the identifier on the same line or is on the next line
+            regiment_name = remove_points(line[ror_match.end():].strip(" :-"))
+            if not regiment_name and i < len(lines):
+                regiment_name = remove_points(lines[i])
+                i += 1
+            if regiment_name:
+                list_dict["regiments_of_renown"].append(regiment_name)
+        elif line.startswith(tactics_ident):
             list_dict["battle_tactics"] = line.replace(tactics_ident, "").replace(":", "").strip().split(tactics_sep)
         elif lore_ident in line:
             lore_name = line.replace("-", "").split(lore_ident, 1)[1].strip()
             if lore_name != "":
                 list_dict["lores"].append(lore_name)
         else:
-            if line.startswith(soggy_ident):
+            if line.startswith(_ALTERNATE_WARSCROLL_IDENT):
 
-                list_dict["units"].append(remove_points(correct_alternate_warscroll_name(line, soggy_ident).strip()))
+                list_dict["units"].append(remove_points(correct_alternate_warscroll_name(line, _ALTERNATE_WARSCROLL_IDENT).strip()))
             list_dict["units"].append(remove_points(line.strip()))
 
-    logger.debug("Finished parsing list %s to dictionary %s", list_dict["name"], str(list_dict))
+    logger.debug("Finished parsing list %s to dictionary %s", list_dict["name"], list_dict)
 
     return list_dict
 
@@ -191,100 +296,88 @@ def remove_points(text: str) -> str:
     :return: the unit text without point values
     """
     # Remove parentheses containing point values as well as the optional - present in enhancements that cost points
-    cleaned = re.sub(r"\s*\(\s*[-+]?\d+\s*\)\s*", " ", text)
+    cleaned = _POINTS_PATTERN.sub(" ", text)
 
     # Remove the Points text if it is present
-    cleaned = re.sub(r"\s+Points", "", cleaned)
+    cleaned = _POINTS_TEXT_PATTERN.sub("", cleaned)
 
     # Remove unnecessary spaces
-    cleaned = re.sub(r"\s+", " ", cleaned)  # normalize multiple spaces
+    cleaned = _WHITESPACE_PATTERN.sub(" ", cleaned)  # normalize multiple spaces
 
     return cleaned.strip()
 
 
-def _remove_redundant_fields(text: str) -> str:
+def _get_list_lines(text: str) -> list[str]:
     """
-    Removes fields not relevant for list parsing from a text
+    Splits the text of a list into its relevant lines, restoring the formatting of lists if newlines go missing (often happens when copying from the app)
     :param text: the text of the list
-    :return: the cleaned text of the list
+    :return: list of the stripped lines, without empty lines and fields not relevant for list parsing
     """
-    redundant_line_tokens = [
-        "General's",
-        "Drops",
-        "Regiment",
-        "Faction Terrain",
-        "App",
-        "Created",
-        "Data",
-        "Version",
-        "Auxiliaries",
-        "Wounds",
-        "----",
-        "Orruk Warclans"  # Temp fix as they are the only faction with split battletome
-    ]
-
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-    filtered_lines = [line for line in lines if not any(token in line for token in redundant_line_tokens)]
-    cleaned_text = "\n".join(filtered_lines)
-
-    return cleaned_text
-
-
-def _norm_list_text(text: str) -> str:
-    """
-    Restore formatting of lists if newlines go missing (often happens when copying from the app)
-    :param text: the list text to normalize
-    :return: normalized list
-    """
-    alt_faction_separator = "|"
-    field_separator = "\n"
-    insert_after_tokens = ["pts"]
-    insert_before_tokens = [
-        "General\'s",
-        "Drops",
-        "Spell ",
-        "Prayer ",
-        "Manifestation ",
-        "Battle Tactic ",
-        "Regiment ",
-        "Faction Terrain",
-        "Created "]
-
     # Attach unit modifiers to unit
-    normed_text = replace_bullet_points(text)
+    if _BULLET_POINT in text:
+        text = replace_bullet_points(text)
 
     # Convert unicode symbols to closest ascii symbol
-    normed_text = anyascii(normed_text)
-    normed_text = normed_text.replace(alt_faction_separator, field_separator)
-
-    # Insert newlines where missing
-    for substring in insert_after_tokens:
-        normed_text = insert_after(normed_text, substring, field_separator)
-    for substring in insert_before_tokens:
-        normed_text = insert_before(normed_text, substring, field_separator)
+    if not text.isascii():
+        text = _NON_ASCII_PATTERN.sub(lambda match: _to_ascii(match[0]), text)
+    text = text.replace(_ALT_FACTION_SEPARATOR, _FIELD_SEPARATOR)
 
-    # Remove double spaces
-    normed_text = normed_text.replace("  ", " ")
+    lines = []
+    for line in _insert_field_breaks(text).splitlines():
+        # Remove double spaces
+        line = line.replace("  ", " ").strip()
+        if line and (not _REDUNDANT_LINE_PATTERN.search(line) or _ROR_PATTERN.search(line)):
+            lines.append(line)
 
-    return normed_text
+    return lines
 
 
-def _get_lore_name_without_ident(lore_name: str) -> str:
-    spell_ident = "Spell Lore"
-    prayer_ident = "Prayer Lore"
-    manifestation_ident = "Manifestation Lore"
-    possible_sep = ":"
+@lru_cache(maxsize=NON_ASCII_CACHE_SIZE)
+def _to_ascii(text: str) -> str:
+    """
+    Helper to convert a run of non-ascii characters to the closest ascii characters.
+    """
+    return anyascii(text)
 
-    if spell_ident in lore_name:
-        new_lore_name = "Spell " + lore_name.replace(spell_ident, "").replace(possible_sep, "").strip()
-    elif prayer_ident in lore_name:
-        new_lore_name = "Prayer " + lore_name.replace(prayer_ident, "").replace(possible_sep, "").strip()
-    elif manifestation_ident in lore_name:
-        new_lore_name = "Manifestation " + lore_name.replace(manifestation_ident, "").replace(possible_sep, "").strip()
-    else:
-        new_lore_name = lore_name.strip()
 
-    return new_lore_name
+def _insert_field_breaks(text: str) -> str:
+    """
+    Helper to insert newlines after each "pts" and before the first occurrence of each of _INSERT_BEFORE_TOKENS in a single scan of the text.
+    Replaces the whitespace around the inserted newlines, as if every "pts" and the first occurrence of each token were substituted one after another.
+    """
+    replacements = []
+    occurrences = {}
+    after_end = 0
+    for match in _FIELD_BREAK_PATTERN.finditer(text):
+        if match["after"] is not None:
+            replacements.append((match.start(), match.end(), f"{_INSERT_AFTER_TOKEN}{_FIELD_SEPARATOR}"))
+            after_end = match.end()
+        else:
+            # The newline replaces the whitespace before the token, unless it was already replaced after "pts"
+            start = match.start()
+            while start > after_end and text[start - 1].isspace():
+                start -= 1
+            occurrences.setdefault(match["before"], []).append((start, match.start()))
+
+    # Tokens are handled in order, as a newline replacing the space after a token removes that occurrence of the token
+    breaks = []
+    for token in _INSERT_BEFORE_TOKENS:
+        for start, token_start in occurrences.get(token, ()):
+            token_end = token_start + len(token)
+            if not any(break_start < token_end and token_start < break_end for break_start, break_end in breaks):
+                breaks.append((start, token_start))
+                replacements.append((start, token_start, _FIELD_SEPARATOR))
+                break
+
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(replacements):
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+
+    return "".join(parts)
 
 
 def replace_bullet_points(text: str, sep: str = " & ") -> str:
@@ -294,37 +387,5 @@ def replace_bullet_points(text: str, sep: str = " & ") -> str:
     :param sep: The new separator with which to replace the bullet points (default: &)
     :return: The resulting text after replacement
     """
-    bullet_point = chr(8226)
-    pattern = rf"\s*{bullet_point}\s*"
-
-    return re.sub(pattern, sep, text)
-
-
-def insert_after(text: str, substring: str, to_insert: str) -> str:
-    """
-    Ensures there is a space after the given substring.
-    If the substring is not present, return text as is.
-    :param text: The text in which the substring is located
-    :param substring: The substring after which to insert the space
-    :param to_insert: The text to insert after the substring
-    :return: text with space inserted
-    """
-    pattern = rf"{re.escape(substring)}\s*"
-    replacement = f"{substring}{to_insert}"
-
-    return re.sub(pattern, replacement, text)
-
-
-def insert_before(text: str, substring: str, to_insert: str) -> str:
-    """
-    Ensures there is a space before the given substring.
-    If the substring is not present, return text as is.
-    :param text: The text in which the substring is located
-    :param substring: The substring before which to insert the space
-    :param to_insert: The text to insert before the substring
-    :return: text with space inserted
-    """
-    pattern = rf"\s*{re.escape(substring)}"
-    replacement = f"{to_insert}{substring}"
+    return _BULLET_POINT_PATTERN.sub(sep, text)
 
-    return re.sub(pattern, replacement, text, count=1)
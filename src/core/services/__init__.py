@@ -1,3 +1,4 @@
 from .ability_service import AbilityService
 from .list_service import ListService
-from .pdf_service import PDFService
\ No newline at end of file
+from .pdf_service import PDFService
+from .batch_list_service import BatchListService, BatchListResult
\ No newline at end of file
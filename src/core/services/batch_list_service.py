@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from src.classes import List
+from src.core.list_parser import get_list_as_dict, parse_list_dict
+from src.data_loading.services import ParsingService
+from src.logging_config import get_logger_for_package
+
+logger = get_logger_for_package(__package__.split('.')[-2])
+
+
+@dataclass(frozen=True)
+class BatchListResult:
+    """
+    Result of parsing one list of a batch, has attributes index: int, source: str, army_list: List | None, error: str | None
+    """
+    index: int  # Position of the list in the batch
+    source: str  # Path of the list file, or the list name for lists given as text
+    army_list: List | None = None
+    error: str | None = None  # Set if the list could not be parsed
+
+
+class BatchListService:
+    """
+    Interface for parsing many army lists, e.g. of a tournament pack.
+    Lists are grouped by faction and army of renown, so each faction is parsed once, and the groups are parsed in a process pool.
+    """
+    def __init__(self, max_workers: int | None = None):
+        """
+        Constructor
+        :param max_workers: the number of processes, None for the number of CPUs (Optional, defaults to None)
+        """
+        self._data_dir: str | None = None
+        self._max_workers = max_workers
+
+    def change_data_dir(self, new_dir):
+        """
+        Sets the location of the data files
+        :param new_dir: the location of the data files
+        """
+        self._data_dir = new_dir
+
+    def load_many(self, army_lists: Iterable[str | Path]) -> Iterator[BatchListResult]:
+        """
+        Parses army lists, yielding the result of each list as soon as its faction group is done.
+        A list which cannot be parsed results in a BatchListResult with an error instead of stopping the batch.
+        :param army_lists: the list texts, Path objects are read as list files
+        :return: iterator of the BatchListResults in order of completion
+        """
+        groups: dict[tuple[str, str | None], list[tuple[int, str, dict]]] = {}
+        for index, army_list in enumerate(army_lists):
+            source = str(army_list) if isinstance(army_list, Path) else None
+            try:
+                if source is not None:
+                    with open(army_list, "r", encoding="utf-8") as file:
+                        army_list = file.read()
+                list_dict = get_list_as_dict(army_list)
+            except Exception as e:
+                logger.error("Failed to read list %d of batch: %s", index, e)
+                yield BatchListResult(index, source or f"list {index}", error=f"{type(e).__name__}: {e}")
+                continue
+
+            groups.setdefault((list_dict["faction"], list_dict["army_of_renown"]), []).append((index, source or list_dict["name"], list_dict))
+
+        max_workers = min(max(1, self._max_workers or os.cpu_count() or 1), len(groups))
+        logger.info("Parsing %d lists of %d factions with %d processes", sum(len(group) for group in groups.values()), len(groups), max_workers)
+
+        if max_workers <= 1:
+            # A single process only adds the start up of the worker
+            for group in groups.values():
+                yield from _parse_group(group, self._data_dir)
+            return
+
+        # Forking a process running a GUI is unsafe, so workers are always spawned and get the data source and cache settings passed
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=ParsingService.apply_settings, initargs=(ParsingService.get_settings(),)) as executor:
+            futures = {executor.submit(_parse_group, group, self._data_dir): group for group in groups.values()}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # Only raised if the worker process itself died
+                    logger.error("Failed to parse lists of faction %s: %s", futures[future][0][2]["faction"], e)
+                    results = [BatchListResult(index, source, error=f"{type(e).__name__}: {e}") for index, source, _ in futures[future]]
+                yield from results
+
+
+def _parse_group(group: list[tuple[int, str, dict]], data_dir: str | None) -> list[BatchListResult]:
+    """
+    Helper run in the worker processes to build the lists of one faction and army of renown.
+    The faction is parsed for the first list and reused from the faction cache of the ParsingService for the others.
+    """
+    results = []
+    for index, source, list_dict in group:
+        try:
+            results.append(BatchListResult(index, source, parse_list_dict(list_dict, data_dir)))
+        except Exception as e:
+            logger.error("Failed to parse list %s: %s", source, e)
+            results.append(BatchListResult(index, source, error=f"{type(e).__name__}: {e}"))
+
+    return results
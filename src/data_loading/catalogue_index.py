@@ -0,0 +1,102 @@
+import json
+import threading
+from pathlib import Path
+
+from lxml import etree
+
+from src.logging_config import get_logger_for_package
+from .catalogue_storage import is_catalogue, open_catalogue, find_catalogue
+from .constants import ENTRY_INDEX_FILE_NAME
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+_index_lock = threading.Lock()
+
+
+def load_entry_index(data_path: str | Path, ns: dict[str, str], catalogues: list[str] | None = None) -> dict[str, str]:
+    """
+    Returns an index of the shared selection entries and entry groups of the catalogues in a data directory, used to resolve links across catalogues.
+    The index is persisted in the data directory and only catalogues which changed since they were indexed are read again.
+    :param data_path: the data directory
+    :param ns: the namespace to use
+    :param catalogues: filenames of the catalogues to index, e.g. those linked from a catalogue, None for all catalogues (Optional, defaults to None)
+    :return: dict with entry ids as keys and the filenames of the catalogues defining them as values
+    """
+    data_path = Path(data_path)
+    index_file = data_path / ENTRY_INDEX_FILE_NAME
+
+    with _index_lock:
+        stored = _read_index_file(index_file)
+        if catalogues is None:
+            paths = [path for path in sorted(data_path.iterdir()) if path.is_file() and is_catalogue(path)] if data_path.is_dir() else []
+        else:
+            paths = sorted(path for catalogue in catalogues if (path := find_catalogue(data_path, catalogue)) is not None)
+
+        files = {}
+        changed = False
+        for path in paths:
+            stat = path.stat()
+            signature = [stat.st_mtime_ns, stat.st_size]
+            if (entry := stored.get(path.name)) is not None and entry["signature"] == signature:
+                files[path.name] = entry
+            else:
+                files[path.name] = {"signature": signature, "ids": _scan_entry_ids(path, ns)}
+                changed = True
+
+        # Catalogues which were not asked for keep their entries as long as they are present
+        persisted = files if catalogues is None else {file: entry for file, entry in stored.items() if (data_path / file).is_file()} | files
+        if changed or persisted.keys() != stored.keys():
+            try:
+                with open(index_file, "w", encoding="utf-8") as f:
+                    json.dump(persisted, f)
+            except OSError as e:
+                logger.warning("Failed to write entry index %s: %s", index_file, e)
+
+    # Entries defined in several catalogues resolve to the first catalogue in alphabetical order
+    index = {}
+    for file, entry in files.items():
+        for entry_id in entry["ids"]:
+            index.setdefault(entry_id, file)
+
+    return index
+
+
+def _read_index_file(index_file: Path) -> dict[str, dict]:
+    """
+    Helper to read the persisted entry index, empty if it is missing or unreadable.
+    """
+    if not index_file.is_file():
+        return {}
+
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable entry index %s: %s", index_file, e)
+        return {}
+
+
+def _scan_entry_ids(path: Path, ns: dict[str, str]) -> list[str]:
+    """
+    Helper to collect the ids of the top level shared selection entries and entry groups of a catalogue without building its tree.
+    """
+    entry_tags = (f"{{{ns['bs']}}}selectionEntry", f"{{{ns['bs']}}}selectionEntryGroup")
+    container_tags = (f"{{{ns['bs']}}}sharedSelectionEntries", f"{{{ns['bs']}}}sharedSelectionEntryGroups")
+    ids = []
+
+    with open_catalogue(path) as f:
+        for _, element in etree.iterparse(f, events=("end",), tag=entry_tags):
+            parent = element.getparent()
+            if parent.tag not in container_tags or parent.getparent().getparent() is not None:
+                continue
+
+            if (entry_id := element.get("id")) is not None:
+                ids.append(entry_id)
+
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
+    logger.debug("Indexed %d entries of %s", len(ids), path.name)
+
+    return ids
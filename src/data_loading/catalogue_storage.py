@@ -0,0 +1,128 @@
+import gzip
+from pathlib import Path
+from typing import BinaryIO
+
+from lxml import etree
+
+from .constants import DATA_FILE_EXTENSION, COMPRESSED_FILE_SUFFIX, COMPRESSION_LEVEL
+
+_compressed_storage = False
+
+
+def set_compressed_storage(enabled: bool):
+    """
+    Sets whether downloaded catalogues are stored gzip compressed.
+    :param enabled: whether to compress catalogues
+    """
+    global _compressed_storage
+    _compressed_storage = enabled
+
+
+def is_compressed_storage() -> bool:
+    """
+    Returns whether downloaded catalogues are stored gzip compressed.
+    :return: True if catalogues are compressed
+    """
+    return _compressed_storage
+
+
+def is_catalogue(path: str | Path) -> bool:
+    """
+    Checks whether a path is a stored catalogue, compressed or not.
+    :param path: the path to check
+    :return: True if the path names a catalogue
+    """
+    return str(path).endswith((DATA_FILE_EXTENSION, DATA_FILE_EXTENSION + COMPRESSED_FILE_SUFFIX))
+
+
+def is_compressed(path: str | Path) -> bool:
+    """
+    Checks whether a stored catalogue (or a partial download of one) is compressed.
+    :param path: the path to check
+    :return: True if the path has a compression suffix
+    """
+    return COMPRESSED_FILE_SUFFIX in Path(path).suffixes
+
+
+def catalogue_name(path: str | Path) -> str:
+    """
+    Returns the filename of a catalogue in the data repo, i.e. without a compression suffix.
+    :param path: the path of the stored catalogue
+    :return: the filename of the catalogue
+    """
+    return Path(path).name.removesuffix(COMPRESSED_FILE_SUFFIX)
+
+
+def storage_path(data_path: str | Path, file: str, compressed: bool | None = None) -> Path:
+    """
+    Returns the path a catalogue is written to.
+    :param data_path: the data directory
+    :param file: the filename of the catalogue in the data repo
+    :param compressed: whether the catalogue is compressed, None to use the current setting (Optional, defaults to None)
+    :return: the path to write the catalogue to
+    """
+    compressed = _compressed_storage if compressed is None else compressed
+    return Path(data_path) / (file + COMPRESSED_FILE_SUFFIX if compressed else file)
+
+
+def find_catalogue(data_path: str | Path, file: str) -> Path | None:
+    """
+    Finds the stored copy of a catalogue, preferring the variant matching the current setting.
+    :param data_path: the data directory
+    :param file: the filename of the catalogue in the data repo
+    :return: the path of the stored catalogue, None if it is not present
+    """
+    for compressed in (_compressed_storage, not _compressed_storage):
+        if (path := storage_path(data_path, file, compressed)).is_file():
+            return path
+
+    return None
+
+
+def open_catalogue(path: str | Path) -> BinaryIO:
+    """
+    Opens a stored catalogue for reading, decompressing it transparently.
+    :param path: the path of the stored catalogue
+    :return: binary file object with the XML content
+    """
+    if is_compressed(path):
+        return gzip.open(path, "rb")
+
+    return Path(path).open("rb")
+
+
+def open_catalogue_for_writing(path: str | Path, mode: str = "wb") -> BinaryIO:
+    """
+    Opens a catalogue for writing, compressing it while writing if the final path has a compression suffix.
+    :param path: the path to write to, may be a partial file of the final path
+    :param mode: "wb" or "ab" (Optional, defaults to "wb")
+    :return: binary file object accepting the XML content
+    """
+    if is_compressed(path):
+        return gzip.open(path, mode, compresslevel=COMPRESSION_LEVEL)
+
+    return Path(path).open(mode)
+
+
+def parse_catalogue(path: str | Path) -> etree._ElementTree:
+    """
+    Parses a stored catalogue into an XML tree.
+    :param path: the path of the stored catalogue
+    :return: the parsed tree
+    """
+    if not is_compressed(path):
+        # Parsing from the filename lets libxml2 read the file directly
+        return etree.parse(str(path))
+
+    with open_catalogue(path) as f:
+        return etree.parse(f)
+
+
+def remove_other_variant(path: str | Path):
+    """
+    Deletes the compressed/uncompressed sibling of a stored catalogue, so that only one variant is present.
+    :param path: the path of the catalogue to keep
+    """
+    path = Path(path)
+    other = storage_path(path.parent, catalogue_name(path), not is_compressed(path))
+    other.unlink(missing_ok=True)
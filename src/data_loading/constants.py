@@ -1,8 +1,37 @@
 REPO_API_URL = "https://api.github.com/repos/BSData/age-of-sigmar-4th/contents/"
 RAW_BASE = "https://raw.githubusercontent.com/BSData/age-of-sigmar-4th/main"
+REPO_TREE_URL = "https://api.github.com/repos/BSData/age-of-sigmar-4th/git/trees/main"
+REPO_ARCHIVE_URL = "https://codeload.github.com/BSData/age-of-sigmar-4th/tar.gz/refs/heads/main"
+MIRROR_INDEX_FILE_NAME = "index.json"
+MIRROR_TREE_FILE_NAME = "tree.json"
+DEFAULT_DOWNLOAD_WORKERS = 8
+DOWNLOAD_CHUNK_SIZE = 8192
+PROGRESS_REPORT_INTERVAL = 0.1  # Minimum seconds between progress reports of received chunks
+REPO_CACHE_FILE_NAME = "repo_cache.json"
+DOWNLOAD_METADATA_FILE_NAME = "download_metadata.json"
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
+COMPRESSED_FILE_SUFFIX = ".gz"
+COMPRESSION_LEVEL = 6
 UNIT_FILE_TOKEN = "Library"
 DATA_FILE_EXTENSION = ".cat"
+LORES_FILE_NAME = "Lores.cat"
+MANIFEST_FILE_NAME = "manifest.json"
+ENTRY_INDEX_FILE_NAME = "entry_index.json"
+PRECOMPILE_REPORT_FILE_NAME = "precompile_report.json"
+REGIMENTS_OF_RENOWN_TOKEN = "Regiments of Renown"
+REGIMENT_NAME_MATCH_THRESHOLD = 0.7  # Minimum similarity of a regiment name which is not found as is
+FACTION_CACHE_DIR_NAME = "cache"
+FACTION_CACHE_FILE_EXTENSION = ".pickle"
+DEFAULT_FACTION_CACHE_ENTRIES = 16
+DEFAULT_FACTION_CACHE_MEMORY_MB = 128
+PARSE_WORKERS = 2
+NON_ASCII_CACHE_SIZE = 4096
+PROJECTION_ABILITIES = "abilities"  # Unit names and abilities
+PROJECTION_STATS = "stats"  # Abilities, characteristics and keywords
+PROJECTION_FULL = "full"  # Everything including weapons
+PARSER_VERSION = 3  # Bump whenever the parser output or the classes change, so that cached factions are parsed again
 SEPARATOR = " - "
+BATTLE_FORMATIONS_KEYWORD = "Battle Formations"
 POSSIBLE_ENHANCEMENT_TYPES = [
         "Artefacts of Power",
         "Heroic Traits",
@@ -22,3 +51,6 @@ GENERAL_MANIFESTATION_LORES = [
         "Primal Energy",
         "Twilit Sorceries",
     ]
+AOR_NAME_ALIASES = {
+        "The Knights of New Summercourt": "New Summercourt",
+    }
@@ -0,0 +1,334 @@
+import hashlib
+import io
+import json
+import email.utils
+from pathlib import Path
+from urllib.parse import urlparse, quote
+from urllib.request import url2pathname
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.logging_config import get_logger_for_package
+from .catalogue_storage import is_compressed, open_catalogue
+from .constants import REPO_API_URL, RAW_BASE, REPO_TREE_URL, REPO_ARCHIVE_URL, DATA_FILE_EXTENSION, MIRROR_INDEX_FILE_NAME, MIRROR_TREE_FILE_NAME
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+
+class TreeUnavailableError(ValueError):
+    """
+    Raised if a data source does not provide a git tree, e.g. a mirror which does not serve a tree.json.
+    """
+
+
+class DataSource:
+    """
+    Base class for the locations catalogues are downloaded from.
+    Listings have to be JSON lists of filenames or of GitHub contents entries, trees have to follow the format of the GitHub tree API.
+    """
+    name = "base"
+
+    @property
+    def listing_url(self) -> str:
+        """
+        Get the URL of the file listing
+        :return: URL of the file listing
+        """
+        raise NotImplementedError
+
+    @property
+    def tree_url(self) -> str | None:
+        """
+        Get the URL of the git tree, None if the source does not provide one
+        :return: URL of the git tree
+        """
+        return None
+
+    @property
+    def archive_url(self) -> str | None:
+        """
+        Get the URL of a tarball of all files, None if the source does not provide one
+        :return: URL of the tarball
+        """
+        return None
+
+    @property
+    def supports_tree(self) -> bool:
+        """
+        Get whether get_tree can be used with this source
+        :return: True if get_tree is supported
+        """
+        return self.tree_url is not None
+
+    def file_url(self, file: str) -> str:
+        """
+        Get the URL of a single file
+        :param file: the filename
+        :return: URL of the file
+        """
+        raise NotImplementedError
+
+    def get_tree(self, session: requests.Session) -> dict[str, str]:
+        """
+        Fetches the git blob SHAs of all files of the source.
+        :param session: the session to use for requests
+        :return: dict with the .cat filenames as keys and their git blob SHAs as values
+        :raises TreeUnavailableError: if the source does not provide a tree
+        """
+        if self.tree_url is None:
+            raise TreeUnavailableError(f"Data source {self.name} does not provide a file tree")
+
+        response = session.get(self.tree_url)
+        if response.status_code == 404:
+            raise TreeUnavailableError(f"Data source {self.name} does not serve a file tree at {self.tree_url}")
+        response.raise_for_status()
+
+        tree = response.json()
+        if tree.get("truncated"):
+            logger.warning("File tree returned by %s is truncated, sync may be incomplete", self.tree_url)
+
+        return {
+            entry["path"]: entry["sha"]
+            for entry in tree["tree"]
+            if entry["type"] == "blob" and "/" not in entry["path"] and entry["path"].endswith(DATA_FILE_EXTENSION)
+        }
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.listing_url!r})"
+
+
+class GitHubDataSource(DataSource):
+    """
+    The BSData repository on GitHub.
+    """
+    name = "github"
+
+    @property
+    def listing_url(self) -> str:
+        return REPO_API_URL
+
+    @property
+    def tree_url(self) -> str | None:
+        return REPO_TREE_URL
+
+    @property
+    def archive_url(self) -> str | None:
+        return REPO_ARCHIVE_URL
+
+    def file_url(self, file: str) -> str:
+        return f"{RAW_BASE}/{file}"
+
+
+class MirrorDataSource(DataSource):
+    """
+    An HTTP server serving the catalogues below a base URL, e.g. a caching server in the local network.
+    The file listing is read from <base_url>/index.json and an optional git tree from <base_url>/tree.json.
+    """
+    name = "mirror"
+
+    def __init__(self, base_url: str, has_tree: bool = True, archive_url: str | None = None):
+        """
+        Constructor.
+        :param base_url: the URL below which the catalogues are served
+        :param has_tree: whether the mirror serves a tree.json (Optional, defaults to True)
+        :param archive_url: URL of a tarball of all files (Optional, defaults to None)
+        """
+        self.base_url = base_url.rstrip("/")
+        self._has_tree = has_tree
+        self._archive_url = archive_url or None
+
+    @property
+    def listing_url(self) -> str:
+        return f"{self.base_url}/{MIRROR_INDEX_FILE_NAME}"
+
+    @property
+    def tree_url(self) -> str | None:
+        return f"{self.base_url}/{MIRROR_TREE_FILE_NAME}" if self._has_tree else None
+
+    @property
+    def archive_url(self) -> str | None:
+        return self._archive_url
+
+    def file_url(self, file: str) -> str:
+        return f"{self.base_url}/{quote(file)}"
+
+
+class LocalDataSource(DataSource):
+    """
+    A local directory containing the catalogues, e.g. a git checkout of the data repo or a network share.
+    Files are served through file:// URLs by the LocalFileAdapter mounted on the download session.
+    """
+    name = "local"
+
+    def __init__(self, path: str | Path):
+        """
+        Constructor.
+        :param path: the directory containing the catalogues
+        """
+        self.path = Path(path).expanduser().resolve()
+
+    @property
+    def listing_url(self) -> str:
+        return self.path.as_uri() + "/"
+
+    @property
+    def supports_tree(self) -> bool:
+        return True
+
+    def file_url(self, file: str) -> str:
+        return (self.path / file).as_uri()
+
+    def get_tree(self, session: requests.Session) -> dict[str, str]:
+        return {
+            file.name: git_blob_sha(file)
+            for file in self.path.iterdir()
+            if file.is_file() and file.name.endswith(DATA_FILE_EXTENSION)
+        }
+
+
+class _FileBody(io.BufferedReader):
+    """
+    Body of a file response, closed when requests releases the connection of the response.
+    requests only closes the body of responses which were not read to the end.
+    """
+    def release_conn(self):
+        self.close()
+
+
+class LocalFileAdapter(BaseAdapter):
+    """
+    Transport adapter answering GET requests for file:// URLs like a static file server.
+    Directories return a JSON listing, files support ETag/If-None-Match and Range requests.
+    """
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """
+        Answers a request from the local filesystem.
+        :param request: the PreparedRequest to answer
+        :return: the Response
+        """
+        path = Path(url2pathname(urlparse(request.url).path))
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict()
+        response.encoding = "utf-8"
+
+        if path.is_dir():
+            body = json.dumps(sorted(file.name for file in path.iterdir() if file.is_file())).encode()
+            response.status_code = 200
+            response.headers["Content-Type"] = "application/json"
+            response.headers["Content-Length"] = str(len(body))
+            response.raw = io.BytesIO(body)
+            return response
+
+        if not path.is_file():
+            response.status_code = 404
+            response.reason = "Not Found"
+            response.raw = io.BytesIO(b"")
+            return response
+
+        stat = path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = email.utils.formatdate(stat.st_mtime, usegmt=True)
+
+        if request.headers.get("If-None-Match") == etag:
+            response.status_code = 304
+            response.raw = io.BytesIO(b"")
+            return response
+
+        start = 0
+        range_header = request.headers.get("Range", "")
+        if range_header.startswith("bytes=") and request.headers.get("If-Range", etag) == etag:
+            start = int(range_header.removeprefix("bytes=").split("-")[0])
+            if start >= stat.st_size:
+                response.status_code = 416
+                response.raw = io.BytesIO(b"")
+                return response
+
+        f = _FileBody(io.FileIO(path, "rb"))
+        f.seek(start)
+        response.raw = f
+        response.headers["Content-Length"] = str(stat.st_size - start)
+        if start:
+            response.status_code = 206
+            response.headers["Content-Range"] = f"bytes {start}-{stat.st_size - 1}/{stat.st_size}"
+        else:
+            response.status_code = 200
+
+        return response
+
+    def close(self):
+        pass
+
+
+_data_source: DataSource = GitHubDataSource()
+
+
+def create_data_source(source_type: str, location: str | None = None, has_tree: bool = True, archive_url: str | None = None) -> DataSource:
+    """
+    Creates a data source from its configuration.
+    :param source_type: one of "github", "mirror" or "local"
+    :param location: the base URL of a mirror or the directory of a local source (Optional for github, defaults to None)
+    :param has_tree: whether a mirror serves a tree.json, ignored by other sources (Optional, defaults to True)
+    :param archive_url: URL of a tarball of all files of a mirror, ignored by other sources (Optional, defaults to None)
+    :return: the DataSource
+    """
+    if source_type in ("", None, GitHubDataSource.name):
+        return GitHubDataSource()
+    if not location:
+        raise ValueError(f"Data source {source_type} requires a location")
+    if source_type == MirrorDataSource.name:
+        return MirrorDataSource(location, has_tree, archive_url)
+    if source_type == LocalDataSource.name:
+        return LocalDataSource(location)
+
+    raise ValueError(f"Unknown data source {source_type}")
+
+
+def get_data_source() -> DataSource:
+    """
+    Returns the data source used for all downloads.
+    :return: the active DataSource
+    """
+    return _data_source
+
+
+def set_data_source(source: DataSource):
+    """
+    Sets the data source used for all downloads, including those started when parsing a faction with missing files.
+    :param source: the new DataSource
+    """
+    global _data_source
+
+    logger.info("Using data source %s", source)
+    _data_source = source
+
+
+def git_blob_sha(path: str | Path) -> str:
+    """
+    Computes the git blob SHA of a file, i.e. the SHA-1 of a "blob <size>" header and a null byte followed by the file content.
+    Compressed catalogues are hashed by their decompressed content.
+    :param path: path of the file
+    :return: the hex digest of the blob SHA
+    """
+    chunk_size = 1024 * 1024
+    path = Path(path)
+
+    if is_compressed(path):
+        # The header needs the decompressed size, which is only known after reading the file once
+        size = 0
+        with open_catalogue(path) as f:
+            while chunk := f.read(chunk_size):
+                size += len(chunk)
+    else:
+        size = path.stat().st_size
+
+    sha = hashlib.sha1(f"blob {size}\0".encode())
+    with open_catalogue(path) as f:
+        while chunk := f.read(chunk_size):
+            sha.update(chunk)
+
+    return sha.hexdigest()
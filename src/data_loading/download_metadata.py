@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import requests
+
+from src.logging_config import get_logger_for_package
+from .constants import DOWNLOAD_METADATA_FILE_NAME
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+
+class DownloadMetadata:
+    """
+    Sidecar store of the HTTP validators (ETag/Last-Modified) of downloaded files and listings, persisted as JSON in the data directory.
+    """
+    def __init__(self, data_location: str | Path):
+        """
+        Constructor, loads the existing metadata of data_location if present.
+        :param data_location: the directory the metadata belongs to
+        """
+        self._path = Path(data_location) / DOWNLOAD_METADATA_FILE_NAME
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, str]] = {}
+
+        if self._path.is_file():
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Ignoring unreadable download metadata %s: %s", self._path, e)
+
+    def conditional_headers(self, key: str) -> dict[str, str]:
+        """
+        Builds the headers for a conditional request of the given entry.
+        :param key: the filename or listing name
+        :return: dict of If-None-Match/If-Modified-Since headers, empty if nothing is known about the entry
+        """
+        with self._lock:
+            entry = self._entries.get(key, {})
+
+        headers = {}
+        if "etag" in entry:
+            headers["If-None-Match"] = entry["etag"]
+        if "last_modified" in entry:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def range_validator(self, key: str) -> str | None:
+        """
+        Gets the validator to send as If-Range when resuming a download of the given entry.
+        :param key: the filename or listing name
+        :return: the ETag or Last-Modified value of the entry, None if nothing is known about it
+        """
+        with self._lock:
+            entry = self._entries.get(key, {})
+
+        return entry.get("etag", entry.get("last_modified"))
+
+    def update(self, key: str, response: requests.Response):
+        """
+        Stores the validators sent with a response, keeping the known ones if the response has none.
+        :param key: the filename or listing name
+        :param response: the response for the entry
+        """
+        entry = {}
+        if etag := response.headers.get("ETag"):
+            entry["etag"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            entry["last_modified"] = last_modified
+
+        if entry:
+            with self._lock:
+                self._entries.setdefault(key, {}).update(entry)
+
+    def remove(self, key: str):
+        """
+        Forgets the validators of an entry.
+        :param key: the filename or listing name
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def save(self):
+        """
+        Writes the metadata to disk, replacing the file at once so a crash cannot leave it half written.
+        """
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self._path)
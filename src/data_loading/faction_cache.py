@@ -0,0 +1,184 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+
+from src.classes import Faction
+from src.logging_config import get_logger_for_package
+from .catalogue_storage import open_catalogue, catalogue_name, find_catalogue
+from .constants import FACTION_CACHE_DIR_NAME, FACTION_CACHE_FILE_EXTENSION, PARSER_VERSION
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+# Digests of catalogues by path, valid as long as mtime and size of the file do not change
+_digests: dict[Path, tuple[int, int, str]] = {}
+_digests_lock = threading.Lock()
+
+
+def catalogue_digest(path: str | Path) -> str:
+    """
+    Computes the SHA-256 of the content of a catalogue, decompressing it if necessary.
+    Digests are remembered for the lifetime of the process until the file changes.
+    :param path: path of the catalogue
+    :return: the hex digest
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    sha = hashlib.sha256()
+    with open_catalogue(path) as f:
+        while chunk := f.read(1024 * 1024):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digests_lock:
+        _digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+
+    return digest
+
+
+def faction_cache_key(files: list[Path | None], *names: str | None) -> str:
+    """
+    Builds the cache key of a parsed faction from the content of its catalogues, the parser version and further names.
+    :param files: the catalogues the faction is parsed from, None entries are ignored
+    :param names: further values the parsed faction depends on, e.g. faction and army of renown name
+    :return: the cache key
+    """
+    sha = hashlib.sha256(f"parser-v{PARSER_VERSION}".encode())
+    for name in names:
+        sha.update(b"\0" + str(name).encode())
+    for file in files:
+        if file is not None:
+            sha.update(b"\0" + catalogue_digest(file).encode())
+
+    return sha.hexdigest()
+
+
+def load_cached_faction(data_path: str | Path, key: str) -> Faction | None:
+    """
+    Loads a parsed faction from the cache of a data directory.
+    :param data_path: the data directory
+    :param key: the cache key of the faction
+    :return: the cached Faction, None if it is not cached or the entry is unreadable
+    """
+    path = _cache_path(data_path, key)
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict):
+                raise pickle.UnpicklingError("entry has no header")
+            faction = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError) as e:
+        logger.warning("Ignoring unreadable cached faction %s: %s", path, e)
+        path.unlink(missing_ok=True)
+        return None
+
+    if not isinstance(faction, Faction):
+        logger.warning("Ignoring cached faction %s of unexpected type %s", path, type(faction).__name__)
+        return None
+
+    return faction
+
+
+def store_faction(data_path: str | Path, key: str, faction: Faction, files: list[Path | None]):
+    """
+    Stores a parsed faction in the cache of a data directory.
+    The entry starts with a header naming the parser version and the catalogues the faction was parsed from, so outdated entries can be pruned.
+    :param data_path: the data directory
+    :param key: the cache key of the faction
+    :param faction: the parsed Faction
+    :param files: the catalogues the faction was parsed from, as passed to faction_cache_key
+    """
+    path = _cache_path(data_path, key)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    try:
+        header = {"parser_version": PARSER_VERSION, "catalogues": {catalogue_name(file): catalogue_digest(file) for file in files if file is not None}}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(faction, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # The cache is an optimization only, parsing must not fail because of it
+        logger.warning("Failed to cache faction %s: %s", faction.name, e)
+        tmp_path.unlink(missing_ok=True)
+        return
+
+    logger.debug("Cached faction %s at %s", faction.name, path)
+
+
+def prune_faction_cache(data_path: str | Path) -> int:
+    """
+    Deletes the cached factions of a data directory which cannot be used anymore,
+    i.e. those parsed by another parser version or from catalogues which changed or were deleted since.
+    :param data_path: the data directory
+    :return: the number of deleted entries
+    """
+    cache_dir = Path(data_path) / FACTION_CACHE_DIR_NAME
+    if not cache_dir.is_dir():
+        return 0
+
+    pruned = 0
+    for path in cache_dir.glob(f"*{FACTION_CACHE_FILE_EXTENSION}"):
+        try:
+            with open(path, "rb") as f:
+                # Only the header is read, not the faction
+                header = pickle.load(f)
+            outdated = not _is_current(data_path, header)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError) as e:
+            logger.debug("Pruning unreadable cached faction %s: %s", path, e)
+            outdated = True
+
+        if outdated:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                # e.g. the entry is being read by another process on Windows
+                logger.debug("Failed to prune cached faction %s: %s", path, e)
+                continue
+            pruned += 1
+
+    logger.info("Pruned %d outdated cached factions of %s", pruned, data_path)
+
+    return pruned
+
+
+def clear_faction_cache(data_path: str | Path):
+    """
+    Deletes all cached factions of a data directory.
+    :param data_path: the data directory
+    """
+    shutil.rmtree(Path(data_path) / FACTION_CACHE_DIR_NAME, ignore_errors=True)
+    logger.info("Cleared faction cache of %s", data_path)
+
+
+def _is_current(data_path: str | Path, header) -> bool:
+    """
+    Helper to check whether the header of a cache entry matches the parser version and the catalogues present in the data directory.
+    """
+    if not isinstance(header, dict) or header.get("parser_version") != PARSER_VERSION:
+        return False
+
+    for file, digest in header.get("catalogues", {}).items():
+        path = find_catalogue(data_path, file)
+        if path is None or catalogue_digest(path) != digest:
+            return False
+
+    return True
+
+
+def _cache_path(data_path: str | Path, key: str) -> Path:
+    """
+    Helper to get the path of a cache entry.
+    """
+    return Path(data_path) / FACTION_CACHE_DIR_NAME / f"{key}{FACTION_CACHE_FILE_EXTENSION}"
@@ -1,16 +1,39 @@
+import re
+import sys
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
 from lxml import etree
 from anyascii import anyascii
 
-from .github_downloader import download_files_for_faction
-from .constants import SEPARATOR, DATA_FILE_EXTENSION, UNIT_FILE_TOKEN, POSSIBLE_ENHANCEMENT_TYPES, POSSIBLE_LORE_TYPES, GENERAL_MANIFESTATION_LORES
-from src.classes import Ability,Weapon,Unit,Faction
+from .github_downloader import download_files_for_faction, download_files, download_regiments_of_renown_files
+from .manifest import CatalogueManifest, load_manifest
+from .catalogue_storage import catalogue_name, find_catalogue, parse_catalogue, open_catalogue
+from .faction_cache import faction_cache_key, load_cached_faction, store_faction
+from .catalogue_index import load_entry_index
+from .symbol_table import CatalogueSymbolTable
+from .constants import SEPARATOR, DATA_FILE_EXTENSION, UNIT_FILE_TOKEN, LORES_FILE_NAME, POSSIBLE_ENHANCEMENT_TYPES, POSSIBLE_LORE_TYPES, GENERAL_MANIFESTATION_LORES, REGIMENTS_OF_RENOWN_TOKEN, REGIMENT_NAME_MATCH_THRESHOLD, PARSE_WORKERS, NON_ASCII_CACHE_SIZE, BATTLE_FORMATIONS_KEYWORD, PROJECTION_ABILITIES, PROJECTION_FULL
+from src.classes import Ability,Weapon,Unit,Faction,RegimentOfRenown,TrigramIndex
+from src.classes.name_index import normalize_name
 
 from src.constants import DEFAULT_BASE_DIR
 from src.logging_config import get_logger_for_package
 
 logger = get_logger_for_package(__package__.split('.')[-1])
 
+# Lore indexes by lore file, valid as long as mtime and size of the file do not change
+_lore_indexes: dict[Path, tuple[tuple[int, int], "LoreIndex"]] = {}
+_lore_indexes_lock = threading.Lock()
+# One lock per lore file, so concurrent requests for the same index parse the file only once
+_lore_index_build_locks: dict[Path, threading.Lock] = {}
+
+# Keywords of the shared selection entry groups parse_faction needs, matched with a single expression
+_ENTRY_GROUP_KEYWORDS = [BATTLE_FORMATIONS_KEYWORD, *POSSIBLE_ENHANCEMENT_TYPES, *POSSIBLE_LORE_TYPES]
+_ENTRY_GROUP_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in _ENTRY_GROUP_KEYWORDS))
+
 
 def read_file(faction_name: str, aor_name: str | None=None, data_path: str | Path=f"{DEFAULT_BASE_DIR}/data") -> tuple[Path, Path, Path, Path]:
     """
@@ -20,74 +43,99 @@ def read_file(faction_name: str, aor_name: str | None=None, data_path: str | Pat
     :param data_path: the path of the data files (Optional, defaults to src/data)
     :return: the paths to the faction file, unit file, army of renown file and spell/prayer/manifestation lore file
     """
-    spells_file = Path(f"{data_path}/Lores{DATA_FILE_EXTENSION}")
-    faction_file = Path(f"{data_path}/{faction_name}{DATA_FILE_EXTENSION}")
-    unit_file = Path(f"{data_path}/{faction_name}{SEPARATOR}{UNIT_FILE_TOKEN}{DATA_FILE_EXTENSION}")
-    aor_file = Path(f"{data_path}/{faction_name}{SEPARATOR}{aor_name}{DATA_FILE_EXTENSION}") if aor_name else None
-    file_missing = False
+    paths = _resolve_files(load_manifest(data_path), faction_name, aor_name, data_path)
+    required = paths if aor_name is not None else paths[:2] + paths[3:]
 
     # Check if the files are already downloaded and download them if necessary
-    if not faction_file.is_file() or not unit_file.is_file() or not spells_file.is_file():
-        file_missing = True
-
-    # Some Armies of Renown have different names in the official App than the dataset (The Knights of New Summercourt vs New Summercourt)
-    if aor_name is not None and not aor_file.is_file():
-        found_aor_file = False
-
-        for file in Path(data_path).iterdir():
-            if file.is_file():
-                alt_aor_file_ident = file.name.split(".")[0].split(SEPARATOR)[-1].strip()
-                if not alt_aor_file_ident in aor_name:
-                    continue
-                else:
-                    aor_file = file
-                    found_aor_file = True
-                    break
-
-        file_missing = not found_aor_file
-
-    if file_missing:
+    if any(path is None or not path.is_file() for path in required):
         logger.debug("Found missing files for %s - %s missing", faction_name, aor_name)
-        filepaths = download_files_for_faction(faction_name, aor_name, data_path)
+        download_files_for_faction(faction_name, aor_name, data_path)
+        paths = _resolve_files(load_manifest(data_path), faction_name, aor_name, data_path)
 
-        # Assign downloaded files to the appropriate variables
-        for file in filepaths:
-            filepath = Path(file)
+    faction_file, unit_file, aor_file, spells_file = paths
 
-            if filepath.name.split(SEPARATOR)[-1].removesuffix(DATA_FILE_EXTENSION) in UNIT_FILE_TOKEN:
-                unit_file = filepath
-            elif aor_name is not None and filepath.name.split(SEPARATOR)[-1].removesuffix(DATA_FILE_EXTENSION) in aor_name:
-                aor_file = filepath
-            elif filepath.name.split(SEPARATOR)[-1].removesuffix(DATA_FILE_EXTENSION) in faction_name:
-                faction_file = filepath
-            elif filepath == spells_file:
-                spells_file = filepath
+    # Keep the default paths for files that could not be found, so the error points to the missing file
+    faction_file = faction_file or Path(f"{data_path}/{faction_name}{DATA_FILE_EXTENSION}")
+    unit_file = unit_file or Path(f"{data_path}/{faction_name}{SEPARATOR}{UNIT_FILE_TOKEN}{DATA_FILE_EXTENSION}")
+    if aor_name and aor_file is None:
+        aor_file = Path(f"{data_path}/{faction_name}{SEPARATOR}{aor_name}{DATA_FILE_EXTENSION}")
 
     return faction_file, unit_file, aor_file, spells_file
 
 
-def parse_files_for_faction(faction_name: str, aor_name: str | None=None, data_path: str | Path=f"{DEFAULT_BASE_DIR}/data") -> Faction:
+def _resolve_files(manifest: CatalogueManifest, faction_name: str, aor_name: str | None, data_path: str | Path) -> tuple[Path | None, Path | None, Path | None, Path]:
+    """
+    Helper to look up the files of a faction and army of renown in a manifest, saving aliases learned on the way.
+    :param manifest: the manifest of the data directory
+    :param faction_name: the name of the faction
+    :param aor_name: the name of the army of renown
+    :param data_path: the path of the data files
+    :return: the paths to the faction file, unit file, army of renown file and lore file, None for unknown files
+    """
+    known_aliases = len(manifest.aliases)
+    faction_file, unit_file, aor_file = manifest.resolve(faction_name, aor_name)
+    if len(manifest.aliases) != known_aliases:
+        manifest.save(data_path)
+
+    # Prefer whichever variant is stored, the manifest may predate a change of the compression setting
+    to_path = lambda file: (find_catalogue(data_path, catalogue_name(file)) or Path(data_path) / file) if file else None
+    spells_file = to_path(manifest.lores or LORES_FILE_NAME)
+
+    return to_path(faction_file), to_path(unit_file), to_path(aor_file), spells_file
+
+
+def parse_files_for_faction(faction_name: str, aor_name: str | None=None, data_path: str | Path=f"{DEFAULT_BASE_DIR}/data", use_cache: bool = True,
+                            lazy_units: bool = False, regiments_of_renown: list[str] | None = None, parallel: bool = False,
+                            projection: str = PROJECTION_FULL) -> Faction:
     """
     Reads and parses the files for a given faction and army of renown to a faction object
     :param faction_name: name of the faction
     :param aor_name: name of the army of renown (Optional, defaults to None)
     :param data_path: the path of the data files (Optional, defaults to src/data)
+    :param use_cache: whether to reuse a previously parsed faction if its files did not change (Optional, defaults to True)
+    :param lazy_units: whether to only build units when they are accessed, all units are built before a lazily parsed faction is cached (Optional, defaults to False)
+    :param regiments_of_renown: names of regiments of renown to add to the faction (Optional, defaults to None)
+    :param parallel: whether to parse the faction, lore and unit files concurrently (Optional, defaults to False)
+    :param projection: the parts of the units to parse, see build_unit (Optional, defaults to PROJECTION_FULL)
     :return: a faction object representing the faction and army of renown
     """
     faction_file, unit_file, aor_file, spells_file = read_file(faction_name, aor_name, data_path)
 
-    # declare namespace and parse files
+    # declare namespace
     ns = {'bs': 'http://www.battlescribe.net/schema/catalogueSchema'}
 
+    cache_key = None
+    cache_files = [aor_file or faction_file, unit_file, spells_file]
+    if use_cache:
+        try:
+            cache_key = faction_cache_key(cache_files, faction_name, aor_name, projection)
+            # A fully parsed faction, e.g. from the precompile sweep, also serves narrower projections
+            full_key = cache_key if projection == PROJECTION_FULL else faction_cache_key(cache_files, faction_name, aor_name, PROJECTION_FULL)
+        except OSError as e:
+            # Missing files are reported by the parser below
+            logger.debug("Not using faction cache for %s - %s: %s", faction_name, aor_name, e)
+        else:
+            if (faction := load_cached_faction(data_path, cache_key)) is not None or \
+                    (full_key != cache_key and (faction := load_cached_faction(data_path, full_key)) is not None):
+                logger.debug("Using cached faction data for %s - %s", faction_name, aor_name)
+                return add_regiments_of_renown(faction, regiments_of_renown, data_path)
+
     logger.debug("Parsing files for faction %s - %s", faction_name, aor_name)
 
-    if aor_file is not None:
-        faction_data = parse_faction(aor_file, spells_file, ns)
+    units_loader = index_units if lazy_units else parse_units
+    if parallel:
+        # The stages are independent until the faction is assembled, lxml releases the GIL while reading the files.
+        # parse_faction only waits for the lore index once the faction file is parsed, and raises if loading it failed.
+        with ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="faction-parser") as executor:
+            lore_future = executor.submit(load_lore_index, spells_file, ns)
+            units_future = executor.submit(units_loader, unit_file, ns, projection=projection)
+            faction_data = parse_faction(aor_file if aor_file is not None else faction_file, spells_file, ns, lore_future)
+            units = units_future.result()
     else:
-        faction_data = parse_faction(faction_file, spells_file, ns)
+        faction_data = parse_faction(aor_file if aor_file is not None else faction_file, spells_file, ns)
+        units = units_loader(unit_file, ns, projection=projection)
 
     battle_traits, battle_formations, enhancements, lores = faction_data
-    units = parse_units(unit_file, ns)
     faction = Faction(
         faction_name,
         battle_traits,
@@ -99,36 +147,213 @@ def parse_files_for_faction(faction_name: str, aor_name: str | None=None, data_p
 
     logger.debug("Finished parsing faction data for %s - %s", faction_name, aor_name)
 
-    return faction
+    if cache_key is not None:
+        # A lazily parsed faction is cached with all units built, so later sessions do not need to read the unit file at all
+        store_faction(data_path, cache_key, replace(faction, units=list(units)) if lazy_units else faction, cache_files)
+
+    return add_regiments_of_renown(faction, regiments_of_renown, data_path)
+
+
+def add_regiments_of_renown(faction: Faction, regiment_names: list[str] | None, data_path: str | Path=f"{DEFAULT_BASE_DIR}/data") -> Faction:
+    """
+    Adds regiments of renown to a parsed faction, regiments are not part of the cached faction as they depend on other catalogues.
+    :param faction: the parsed faction
+    :param regiment_names: the names of the regiments as used in the list
+    :param data_path: the path of the data files (Optional, defaults to src/data)
+    :return: a copy of the faction with the regiments, the faction itself if no regiments are given
+    """
+    if not regiment_names:
+        return faction
+
+    # declare namespace
+    ns = {'bs': 'http://www.battlescribe.net/schema/catalogueSchema'}
+
+    return replace(faction, regiments_of_renown=parse_regiments_of_renown(regiment_names, data_path, ns))
+
+
+def parse_regiments_of_renown(regiment_names: list[str], data_path: str | Path, ns: dict[str, str]) -> dict[str, RegimentOfRenown]:
+    """
+    Parses regiments of renown from the regiments of renown catalogues, downloading them if necessary.
+    Regiments are matched by name, ignoring case and a "Regiment of Renown" prefix, names which are not found are resolved to the most similar regiment name.
+    Units of a regiment are defined in other catalogues and reached through entry links. They are found with an index of the entries
+    of the linked catalogues, so only the linked entries are built instead of whole unit libraries.
+    :param regiment_names: the names of the regiments as used in the list
+    :param data_path: the path of the data files
+    :param ns: the namespace to use
+    :return: dict with the requested names as keys and the regiments as values, regiments which cannot be found are left out
+    """
+    regiment_files = _find_regiment_files(load_manifest(data_path), data_path)
+    if not regiment_files:
+        logger.debug("Found no regiments of renown files, downloading them")
+        download_regiments_of_renown_files(data_path)
+        regiment_files = _find_regiment_files(load_manifest(data_path), data_path)
+
+    # Regiments by normalized name without the "Regiment of Renown" prefix, the first catalogue defining a name wins
+    candidates: dict[str, tuple[str, etree._Element, int]] = {}
+    catalogues: list[tuple[CatalogueSymbolTable, list[str]]] = []
+    for regiment_file in regiment_files:
+        root = parse_catalogue(regiment_file).getroot()
+        linked_catalogues = [link.get("name") for link in root.iterfind("bs:catalogueLinks/bs:catalogueLink", namespaces=ns) if link.get("name")]
+        catalogues.append((CatalogueSymbolTable.from_catalogues(root), linked_catalogues))
+
+        for element in root.xpath("./bs:sharedSelectionEntries/bs:selectionEntry | ./bs:sharedSelectionEntryGroups/bs:selectionEntryGroup", namespaces=ns):
+            if element.get("name") is not None:
+                name = _strip_regiment_prefix(non_safe_ascii_parsing(element.get("name")))
+                candidates.setdefault(normalize_name(name), (name, element, len(catalogues) - 1))
+
+    regiments = {}
+    trigrams = None
+    for requested_name in regiment_names:
+        if requested_name in regiments:
+            continue
+
+        candidate = candidates.get(normalize_name(_strip_regiment_prefix(requested_name)))
+        if candidate is None:
+            # Near misses, e.g. differing punctuation, are resolved to the most similar regiment name
+            trigrams = trigrams if trigrams is not None else TrigramIndex(name for name, _, _ in candidates.values())
+            if (match := trigrams.best_match(_strip_regiment_prefix(requested_name), REGIMENT_NAME_MATCH_THRESHOLD)) is not None:
+                logger.info("Resolved regiment of renown %s as %s with similarity %.2f", requested_name, match[0], match[1])
+                candidate = candidates[normalize_name(match[0])]
+
+        if candidate is None:
+            logger.warning("Regiment of renown %s not found", requested_name)
+            continue
+
+        _, element, catalogue_idx = candidate
+        symbols, linked_catalogues = catalogues[catalogue_idx]
+        regiments[requested_name] = _build_regiment(element, symbols, linked_catalogues, data_path, ns)
 
+    return regiments
 
-def parse_faction(faction_file:Path, spells_file:Path, ns: dict[str, str]) -> tuple[list[Ability],  dict[str, Ability],  dict[str, list[Ability]], dict[str, list[Ability]]]:
+
+def _find_regiment_files(manifest: CatalogueManifest, data_path: str | Path) -> list[Path]:
+    """
+    Helper to get the paths of the downloaded regiments of renown catalogues.
+    """
+    files = []
+    for faction_name, entry in manifest.factions.items():
+        if REGIMENTS_OF_RENOWN_TOKEN in faction_name:
+            files.extend(file for file in (entry["base"], entry["library"], *entry["armies_of_renown"].values()) if file)
+
+    return [path for file in files if (path := find_catalogue(data_path, catalogue_name(file))) is not None]
+
+
+def _strip_regiment_prefix(name: str) -> str:
+    """
+    Helper to remove the "Regiment of Renown" prefix some regiment names carry.
+    """
+    return name.replace("Regiment of Renown", "").strip(" :-")
+
+
+def _build_regiment(element, symbols: CatalogueSymbolTable, linked_catalogues: list[str], data_path: str | Path, ns: dict[str, str]) -> RegimentOfRenown:
+    """
+    Helper to build a regiment of renown from its entry, building only the linked units.
+    """
+    profile_tag = f"{{{ns['bs']}}}profile"
+    link_tag = f"{{{ns['bs']}}}entryLink"
+    name = _strip_regiment_prefix(non_safe_ascii_parsing(element.get("name")))
+
+    abilities = [
+        build_ability_from_profile(profile, ns)
+        for profile in element.iter(profile_tag)
+        if "Ability" in non_safe_ascii_parsing(profile.get("typeName"))
+    ]
+
+    units = []
+    foreign_ids = set()
+    for link in element.iter(link_tag):
+        target = symbols.resolve_link(link)
+        if target is None:
+            foreign_ids.add(link.get("targetId"))
+            continue
+        if not is_unit_entry(target, ns):
+            logger.debug("Skipping linked entry %s of regiment %s as it is not a unit", link.get("name"), name)
+            continue
+        units.append(build_unit(target, symbols, ns))
+
+    if foreign_ids:
+        units.extend(_load_linked_units(foreign_ids, linked_catalogues, data_path, ns))
+
+    logger.debug("Parsed regiment of renown %s with %d units", name, len(units))
+
+    return RegimentOfRenown(name, abilities, units)
+
+
+def _load_linked_units(entry_ids: set[str], linked_catalogues: list[str], data_path: str | Path, ns: dict[str, str]) -> list[Unit]:
+    """
+    Helper to build the units with the given entry ids from the catalogues defining them, downloading linked catalogues if ids are unknown.
+    """
+    linked_files = [f"{catalogue}{DATA_FILE_EXTENSION}" for catalogue in linked_catalogues]
+    index = load_entry_index(data_path, ns, linked_files)
+    if any(entry_id not in index for entry_id in entry_ids):
+        missing = [file for file in linked_files if find_catalogue(data_path, file) is None]
+        if missing:
+            logger.debug("Downloading %d linked catalogues for regiments of renown", len(missing))
+            download_files(missing, data_path)
+            index = load_entry_index(data_path, ns, linked_files)
+
+    ids_by_file = {}
+    for entry_id in entry_ids:
+        if entry_id in index:
+            ids_by_file.setdefault(index[entry_id], set()).add(entry_id)
+        else:
+            logger.warning("Linked entry %s of a regiment of renown not found", entry_id)
+
+    units = []
+    for file, ids in sorted(ids_by_file.items()):
+        units.extend(stream_units(Path(data_path) / file, ns, ids))
+
+    return units
+
+
+def parse_faction(faction_file:Path, spells_file:Path, ns: dict[str, str], lore_future: Future | None = None) -> tuple[list[Ability],  dict[str, Ability],  dict[str, list[Ability]], dict[str, list[Ability]]]:
     """
     Parses faction wide abilities based on the .cat files relevant for a faction
     :param faction_file: the .cat file containing the faction data
     :param spells_file: the .cat file containing the spell/prayer/manifestation lore data
     :param ns: the namespace to use
+    :param lore_future: future of the lore index if it is loaded concurrently, otherwise it is loaded from spells_file (Optional, defaults to None)
     :return: tuple containing battle traits, battle formations, enhancements, spell/prayer/manifestation lores
     """
-    faction_tree = etree.parse(str(faction_file))
+    faction_tree = parse_catalogue(faction_file)
     faction_root = faction_tree.getroot()
-    spells_tree = etree.parse(str(spells_file))
-    spells_root = spells_tree.getroot()
 
     # find relevant fields for battle traits, battle formations, and enhancements
     shared_sel_entries = faction_root.find("bs:sharedSelectionEntries", namespaces=ns)
     shared_profiles = faction_root.find("bs:sharedProfiles", namespaces=ns)
     shared_sel_entry_groups = faction_root.find("bs:sharedSelectionEntryGroups", namespaces=ns)
-    spells_shared_sel_entry_groups = spells_root.find("bs:sharedSelectionEntryGroups", namespaces=ns)
+
+    # Every group is only looked at once, no matter how many enhancement and lore types there are
+    groups_by_keyword = sort_entry_groups(shared_sel_entry_groups, ns)
 
     battle_traits = get_battle_traits(shared_sel_entries, shared_profiles, ns)
-    battle_formations = get_battle_formations(shared_sel_entry_groups, ns)
-    enhancements = get_enhancements(shared_sel_entry_groups, ns)
-    lores = get_lores(shared_sel_entry_groups, spells_shared_sel_entry_groups, ns)
+    battle_formations = get_battle_formations(groups_by_keyword[BATTLE_FORMATIONS_KEYWORD], ns)
+    enhancements = get_enhancements(groups_by_keyword, ns)
+    lore_index = lore_future.result() if lore_future is not None else load_lore_index(spells_file, ns)
+    lores = get_lores(groups_by_keyword, lore_index, ns)
 
     return battle_traits, battle_formations, enhancements, lores
 
 
+def sort_entry_groups(shared_sel_entry_groups, ns: dict[str, str]) -> dict[str, list]:
+    """
+    Sorts the shared selection entry groups of a faction file by the keywords in their names in a single pass.
+    :param shared_sel_entry_groups: the xml shared selection entry groups
+    :param ns: the namespace to use
+    :return: dict with "Battle Formations" and the enhancement and lore types as keys and the groups whose names contain them as values, in document order
+    """
+    groups_by_keyword = {keyword: [] for keyword in _ENTRY_GROUP_KEYWORDS}
+    if shared_sel_entry_groups is None:
+        return groups_by_keyword
+
+    for group in shared_sel_entry_groups.iterchildren(f"{{{ns['bs']}}}selectionEntryGroup"):
+        # A group is sorted into every keyword it contains
+        for keyword in set(_ENTRY_GROUP_PATTERN.findall(group.get("name", ""))):
+            groups_by_keyword[keyword].append(group)
+
+    return groups_by_keyword
+
+
 def get_battle_traits(shared_sel_entries, shared_profiles, ns: dict[str, str]) -> list[Ability]:
     """
     Get the available battle traits based on the shared selection entries and shared profiles.
@@ -137,12 +362,13 @@ def get_battle_traits(shared_sel_entries, shared_profiles, ns: dict[str, str]) -
     :param ns: the namespace to use
     :return: list of abilities
     """
-    battle_trait_entry = shared_sel_entries.xpath("./bs:selectionEntry[contains(@name, 'Battle Traits')]", namespaces=ns)[0]
+    entry_tag = f"{{{ns['bs']}}}selectionEntry"
+    battle_trait_entry = next((entry for entry in shared_sel_entries.iterchildren(entry_tag) if "Battle Traits" in entry.get("name", "")), None)
     if battle_trait_entry is None:
         logger.warning("No Battle Traits found in faction file.")
         return []
 
-    profiles = battle_trait_entry.find("bs:profiles", namespaces=ns)
+    profiles = list(battle_trait_entry.find("bs:profiles", namespaces=ns))
     # Some armies (e.g. Flesh-eater Courts) have additional battle traits in the shared Profile section
     if shared_profiles is not None:
         profiles.extend(shared_profiles.findall("bs:profile", namespaces=ns))
@@ -154,24 +380,18 @@ def get_battle_traits(shared_sel_entries, shared_profiles, ns: dict[str, str]) -
     return battle_traits
 
 
-def get_battle_formations(shared_sel_entry_groups, ns: dict[str, str]) -> dict[str, Ability]:
+def get_battle_formations(battle_formation_groups: list, ns: dict[str, str]) -> dict[str, Ability]:
     """
-    Get the battle formations available based on the shared selection entry groups.
-    :param shared_sel_entry_groups: the xml shared selection entry groups
+    Get the battle formations available based on the battle formation groups.
+    :param battle_formation_groups: the xml shared selection entry groups containing "Battle Formations", see sort_entry_groups
     :param ns: the namespace to use
     :return: dict containing battle formation name as key and granted ability as value
     """
-    battle_formation_entries = shared_sel_entry_groups.xpath("./bs:selectionEntryGroup[contains(@name, 'Battle Formations')]", namespaces=ns)
-    if not battle_formation_entries:
-        return {}
-    else:
-        battle_formation_entry = battle_formation_entries[0]
-
-    if battle_formation_entry is None:
+    if not battle_formation_groups:
         return {}
 
     battle_formations = {}
-    formations = battle_formation_entry.find("bs:selectionEntries", namespaces=ns)
+    formations = battle_formation_groups[0].find("bs:selectionEntries", namespaces=ns)
     for formation in formations:
         formation_name = non_safe_ascii_parsing(formation.get("name"))
         profile = formation.find("bs:profiles", namespaces=ns)[0]
@@ -182,162 +402,454 @@ def get_battle_formations(shared_sel_entry_groups, ns: dict[str, str]) -> dict[s
     return battle_formations
 
 
-def get_enhancements(shared_sel_entry_groups, ns: dict[str, str]) -> dict[str, list[Ability]]:
+def get_enhancements(groups_by_keyword: dict[str, list], ns: dict[str, str]) -> dict[str, list[Ability]]:
     """
-    Get the enhancements available based on the shared selection entry groups
-    :param shared_sel_entry_groups: the xml shared selection entry groups
+    Get the enhancements available based on the sorted shared selection entry groups
+    :param groups_by_keyword: the xml shared selection entry groups sorted by sort_entry_groups
     :param ns: the namespace to use
     :return: a dict containing enhancement table names as keys and a list of the enhancements in those table as values
     """
-    enhancement_entry_groups = []
-
-    for keyword in POSSIBLE_ENHANCEMENT_TYPES:
-        xpath = f"./bs:selectionEntryGroup[contains(@name, '{keyword}')]"
-        enhancement_entry_groups.extend(shared_sel_entry_groups.xpath(xpath, namespaces=ns))
-
     enhancements = {}
-    for enhancement_type in enhancement_entry_groups:
-        groups = enhancement_type.findall(".//bs:selectionEntryGroups/bs:selectionEntryGroup", namespaces=ns)
+    for keyword in POSSIBLE_ENHANCEMENT_TYPES:
+        for enhancement_type in groups_by_keyword[keyword]:
+            groups = enhancement_type.findall(".//bs:selectionEntryGroups/bs:selectionEntryGroup", namespaces=ns)
 
-        for group in groups:
-            group_name = non_safe_ascii_parsing(group.get("name"))
-            enhancements[group_name] = []
-            profiles = group.findall(".//bs:selectionEntries/bs:selectionEntry/bs:profiles/bs:profile", namespaces=ns)
+            for group in groups:
+                group_name = non_safe_ascii_parsing(group.get("name"))
+                enhancements[group_name] = []
+                profiles = group.findall(".//bs:selectionEntries/bs:selectionEntry/bs:profiles/bs:profile", namespaces=ns)
 
-            for profile in profiles:
-                enhancements[group_name].append(build_ability_from_profile(profile, ns))
+                for profile in profiles:
+                    enhancements[group_name].append(build_ability_from_profile(profile, ns))
 
     return enhancements
 
 
-def get_lores(shared_sel_entry_groups, spells_shared_sel_entry_groups, ns: dict[str, str]) -> dict[str, list[Ability]]:
+def get_lores(groups_by_keyword: dict[str, list], lore_index: "LoreIndex", ns: dict[str, str]) -> dict[str, list[Ability]]:
     """
-    Get spell, prayer, and manifestation lores from shared selection entry groups.
-    :param shared_sel_entry_groups: the xml shared selection entry groups in which lore names are available
-    :param spells_shared_sel_entry_groups: the xml shared selection entry groups in which lore abilities are available
+    Get spell, prayer, and manifestation lores from the sorted shared selection entry groups.
+    :param groups_by_keyword: the xml shared selection entry groups sorted by sort_entry_groups, in which lore names are available
+    :param lore_index: the index of the lore abilities
     :param ns: the namespace to use
     :return: dict containing lore names as keys and list of spell/prayer abilities as values
     """
-    lore_entry_groups = []
-
-    for keyword in POSSIBLE_LORE_TYPES:
-        xpath = f"./bs:selectionEntryGroup[contains(@name, '{keyword}')]"
-        lore_entry_groups.extend(shared_sel_entry_groups.xpath(xpath, namespaces=ns))
-
     # Find available lores in faction file and add universal ones
     lores = {
         non_safe_ascii_parsing(lore.get("name")): []
-        for lore_type in lore_entry_groups
+        for keyword in POSSIBLE_LORE_TYPES
+        for lore_type in groups_by_keyword[keyword]
         for lore in lore_type.findall(".//bs:selectionEntries/bs:selectionEntry", namespaces=ns)
     }
     lores.update({key: [] for key in GENERAL_MANIFESTATION_LORES if key not in lores})
 
     # Find corresponding lores in Lores.cat file and add them to the dict
     for lore in lores:
-        xpath = f'./bs:selectionEntryGroup[contains(@name, "{lore}")]'
-        spell_group = spells_shared_sel_entry_groups.xpath(xpath, namespaces=ns)[0]
-        profiles = spell_group.findall(".//bs:selectionEntries/bs:selectionEntry/bs:profiles/bs:profile", namespaces=ns)
-        for profile in profiles:
-            lores[lore].append(build_ability_from_profile(profile, ns))
+        if (abilities := lore_index.get(lore)) is None:
+            logger.warning("Lore %s not found in lore file", lore)
+            continue
+        lores[lore].extend(abilities)
 
     logger.debug("Finished parsing lores")
 
     return lores
 
 
-def parse_units(unit_file: Path, ns: dict[str, str]) -> list[Unit]:
+class LoreIndex:
+    """
+    Index of the lores of a lore file, holding the abilities of every lore group by group name.
+    """
+    def __init__(self, groups: list[tuple[str, list[Ability]]]):
+        """
+        Constructor.
+        :param groups: list of tuples of group name and abilities, in the order of the lore file
+        """
+        self._groups = groups
+        self._by_name: dict[str, int] = {}
+        for idx, (name, _) in enumerate(groups):
+            self._by_name.setdefault(name, idx)
+        # Names which are only part of a group name, remembered so each is only searched for once
+        self._by_partial_name: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_groups(cls, spells_shared_sel_entry_groups, ns: dict[str, str]) -> "LoreIndex":
+        """
+        Builds the index from the shared selection entry groups of a lore file.
+        :param spells_shared_sel_entry_groups: the xml shared selection entry groups in which lore abilities are available
+        :param ns: the namespace to use
+        :return: the LoreIndex
+        """
+        return cls([
+            (group.get("name"), [
+                build_ability_from_profile(profile, ns)
+                for profile in group.findall(".//bs:selectionEntries/bs:selectionEntry/bs:profiles/bs:profile", namespaces=ns)
+            ])
+            for group in spells_shared_sel_entry_groups.findall("bs:selectionEntryGroup", namespaces=ns)
+        ])
+
+    def get(self, lore: str) -> list[Ability] | None:
+        """
+        Get the abilities of a lore, i.e. of the lore group with the lore name, or else of the first lore group whose name contains it.
+        :param lore: the lore name
+        :return: a new list of the abilities, None if no group matches
+        """
+        idx = self._by_name.get(lore)
+        if idx is None:
+            with self._lock:
+                if lore not in self._by_partial_name:
+                    self._by_partial_name[lore] = next((idx for idx, (name, _) in enumerate(self._groups) if lore in name), -1)
+                idx = self._by_partial_name[lore]
+
+        return list(self._groups[idx][1]) if idx >= 0 else None
+
+
+def load_lore_index(spells_file: Path, ns: dict[str, str]) -> LoreIndex:
+    """
+    Returns the lore index of a lore file, parsing it only if it was not indexed before or changed since.
+    :param spells_file: the .cat file containing the spell/prayer/manifestation lore data
+    :param ns: the namespace to use
+    :return: the LoreIndex
+    """
+    path = Path(spells_file).resolve()
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _lore_indexes_lock:
+        cached = _lore_indexes.get(path)
+        build_lock = _lore_index_build_locks.setdefault(path, threading.Lock())
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with build_lock:
+        # Another thread may have built the index while waiting for the lock
+        with _lore_indexes_lock:
+            cached = _lore_indexes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        spells_root = parse_catalogue(path).getroot()
+        lore_index = LoreIndex.from_groups(spells_root.find("bs:sharedSelectionEntryGroups", namespaces=ns), ns)
+
+        with _lore_indexes_lock:
+            _lore_indexes[path] = (signature, lore_index)
+    logger.debug("Indexed lores of %s", path)
+
+    return lore_index
+
+
+def parse_units(unit_file: Path, ns: dict[str, str], streaming: bool = True, projection: str = PROJECTION_FULL) -> list[Unit]:
     """
     Parse a .cat (xml) file containing unit data.
     :param unit_file: path to the .cat file
     :param ns: the namespace to use
+    :param streaming: whether to build units while reading the file instead of parsing the whole file first (Optional, defaults to True)
+    :param projection: the parts of the units to parse, see build_unit (Optional, defaults to PROJECTION_FULL)
     :return: units present in the .cat file
     """
-    unit_tree = etree.parse(unit_file)
-    unit_root = unit_tree.getroot()
+    if streaming:
+        units = stream_units(unit_file, ns, projection=projection)
+    else:
+        unit_tree = parse_catalogue(unit_file)
+        unit_root = unit_tree.getroot()
 
-    shared_sel_entries = unit_root.find("bs:sharedSelectionEntries", namespaces=ns)
-    shared_profiles = unit_root.find("bs:sharedProfiles", namespaces=ns)
+        shared_sel_entries = unit_root.find("bs:sharedSelectionEntries", namespaces=ns)
+        symbols = CatalogueSymbolTable.from_catalogues(unit_root)
 
-    units = get_units(shared_sel_entries, shared_profiles, ns)
+        units = get_units(shared_sel_entries, symbols, ns, projection)
 
     logger.debug("Finished parsing units")
 
     return units
 
 
-def get_units(shared_sel_entries, shared_profiles, ns: dict[str, str]) -> list[Unit]:
+def stream_units(unit_file: Path, ns: dict[str, str], entry_ids: set[str] | None = None, projection: str = PROJECTION_FULL) -> list[Unit]:
+    """
+    Parse the units of a .cat (xml) file incrementally, building each unit as soon as its entry is read and freeing the entry afterwards.
+    Keeps memory usage independent of the size of the file, the result is the same as with get_units.
+    :param unit_file: path to the .cat file
+    :param ns: the namespace to use
+    :param entry_ids: ids of the selection entries to build, None to build all units (Optional, defaults to None)
+    :param projection: the parts of the units to parse, see build_unit (Optional, defaults to PROJECTION_FULL)
+    :return: units present in the .cat file
+    """
+    entry_tag = f"{{{ns['bs']}}}selectionEntry"
+    entries_tag = f"{{{ns['bs']}}}sharedSelectionEntries"
+    profiles_tag = f"{{{ns['bs']}}}sharedProfiles"
+
+    units = []
+    # Abilities linked by infoLinks are resolved against the shared profiles, which usually follow the shared selection entries.
+    # Until then only the link and the position of the ability in the unit are kept, so entries can still be freed.
+    deferred_links = []
+    symbols = CatalogueSymbolTable()
+    profiles_read = False
+
+    with open_catalogue(unit_file) as f:
+        for _, element in etree.iterparse(f, events=("end",), tag=(entry_tag, profiles_tag)):
+            if element.tag == profiles_tag:
+                if element.getparent().getparent() is None:
+                    symbols.register(element)
+                    profiles_read = True
+                continue
+
+            if element.getparent().tag != entries_tag:
+                continue
+
+            if entry_ids is None or element.get("id") in entry_ids:
+                if entry_ids is not None and not is_unit_entry(element, ns):
+                    # Entries picked by id may be linked upgrades instead of units
+                    logger.warning("Skipping entry %s of %s as it is not a unit", element.get("name"), Path(unit_file).name)
+                else:
+                    unit = build_unit(element, symbols, ns, projection)
+                    if not profiles_read and (info_link := element.find("bs:infoLinks/bs:infoLink", namespaces=ns)) is not None:
+                        position = sum(1 for profile in element.findall("bs:profiles/bs:profile", namespaces=ns) if "Ability" in non_safe_ascii_parsing(profile.get("typeName")))
+                        deferred_links.append((len(units), position, info_link.get("targetId"), info_link.get("name")))
+                    units.append(unit)
+
+            # Free the finished entry and drop it from the tree
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    for idx, position, target_id, ability_cross_name in deferred_links:
+        # Same lookup as in build_unit, abilities which cannot be found are ignored
+        if (ability_profile := symbols.resolve_profile(target_id, ability_cross_name, "sharedProfiles")) is not None:
+            abilities = list(units[idx].abilities)
+            abilities.insert(position, build_ability_from_profile(ability_profile, ns))
+            units[idx] = replace(units[idx], abilities=abilities)
+
+    return units
+
+
+def index_units(unit_file: Path, ns: dict[str, str], projection: str = PROJECTION_FULL) -> "LazyUnitList":
     """
-    Get unit objects from shared selection entries and shared profiles
+    Index the units of a .cat (xml) file by name and id without building them.
+    :param unit_file: path to the .cat file
+    :param ns: the namespace to use
+    :param projection: the parts of the units to parse when they are built, see build_unit (Optional, defaults to PROJECTION_FULL)
+    :return: LazyUnitList building the units on access
+    """
+    entry_tag = f"{{{ns['bs']}}}selectionEntry"
+    entries_tag = f"{{{ns['bs']}}}sharedSelectionEntries"
+    profiles_tag = f"{{{ns['bs']}}}sharedProfiles"
+
+    entries = []
+    symbols = CatalogueSymbolTable()
+
+    with open_catalogue(unit_file) as f:
+        for _, element in etree.iterparse(f, events=("end",), tag=(entry_tag, profiles_tag)):
+            if element.tag == profiles_tag:
+                if element.getparent().getparent() is None:
+                    symbols.register(element)
+                continue
+
+            if element.getparent().tag != entries_tag:
+                continue
+
+            entries.append((non_safe_ascii_parsing(element.get("name")), element.get("id"), etree.tostring(element)))
+
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    logger.debug("Indexed %d units", len(entries))
+
+    return LazyUnitList(entries, symbols, ns, projection)
+
+
+class LazyUnitList(Sequence):
+    """
+    Sequence of the units of a unit library which only builds a unit when it is accessed.
+    Units are stored as serialized XML entries, indexed by name and id.
+    """
+    def __init__(self, entries: list[tuple[str, str | None, bytes]], symbols: CatalogueSymbolTable, ns: dict[str, str], projection: str = PROJECTION_FULL):
+        """
+        Constructor.
+        :param entries: list of tuples of unit name, entry id and serialized selection entry, in the order of the library
+        :param symbols: symbol table of the shared profiles of the library to resolve infoLinks with
+        :param ns: the namespace to use
+        :param projection: the parts of the units to parse, see build_unit (Optional, defaults to PROJECTION_FULL)
+        """
+        self._entries = entries
+        self._symbols = symbols
+        self._ns = ns
+        self._projection = projection
+        self._units: dict[int, Unit] = {}
+        self._lock = threading.Lock()
+        self._by_name: dict[str, list[int]] = {}
+        self._by_id: dict[str, int] = {}
+
+        for idx, (name, entry_id, _) in enumerate(entries):
+            self._by_name.setdefault(name, []).append(idx)
+            if entry_id is not None:
+                self._by_id[entry_id] = idx
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._build(i) for i in range(len(self._entries))[idx]]
+
+        if idx < 0:
+            idx += len(self._entries)
+        if not 0 <= idx < len(self._entries):
+            raise IndexError("unit index out of range")
+
+        return self._build(idx)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"LazyUnitList({len(self._entries)} units, {len(self._units)} built)"
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(len(entry[2]) for entry in self._entries)
+
+    def find(self, name: str) -> list[Unit]:
+        """
+        Get the units with the given name, building only those
+        :param name: the unit name
+        :return: list of matching units in library order
+        """
+        return [self._build(idx) for idx in self._by_name.get(name, [])]
+
+    def get_by_id(self, entry_id: str) -> Unit | None:
+        """
+        Get the unit with the given selection entry id
+        :param entry_id: the id of the selection entry
+        :return: the unit, None if the id is unknown
+        """
+        idx = self._by_id.get(entry_id)
+        return self._build(idx) if idx is not None else None
+
+    @property
+    def names(self) -> list[str]:
+        """
+        Get the names of all units without building them
+        :return: list of unit names in library order
+        """
+        return [entry[0] for entry in self._entries]
+
+    def _build(self, idx: int) -> Unit:
+        """
+        Helper to build a unit once and remember it.
+        """
+        if (unit := self._units.get(idx)) is not None:
+            return unit
+
+        with self._lock:
+            if idx not in self._units:
+                entry = etree.fromstring(self._entries[idx][2])
+                self._units[idx] = build_unit(entry, self._symbols, self._ns, self._projection)
+
+            return self._units[idx]
+
+
+def get_units(shared_sel_entries, symbols: CatalogueSymbolTable, ns: dict[str, str], projection: str = PROJECTION_FULL) -> list[Unit]:
+    """
+    Get unit objects from shared selection entries
     :param shared_sel_entries: xml shared selection entries
-    :param shared_profiles: xml shared profiles
+    :param symbols: symbol table of the catalogue to resolve links with
     :param ns: the namespace to use
     :return: list of units
     """
-    units = []
+    return [build_unit(entry, symbols, ns, projection) for entry in shared_sel_entries]
+
+
+def is_unit_entry(entry, ns: dict[str, str]) -> bool:
+    """
+    Checks whether a selection entry is a unit or manifestation, e.g. to skip upgrades and entry groups linked from regiments of renown
+    :param entry: xml element of the entry
+    :param ns: the namespace to use
+    :return: True if the entry has a unit or manifestation profile
+    """
+    return any(
+        "Unit" in type_name or "Manifestation" in type_name
+        for type_name in (profile.get("typeName") or "" for profile in entry.iterfind("bs:profiles/bs:profile", namespaces=ns))
+    )
+
+
+def build_unit(entry, symbols: CatalogueSymbolTable, ns: dict[str, str], projection: str = PROJECTION_FULL) -> Unit:
+    """
+    Build a Unit object from its shared selection entry
+    :param entry: xml selection entry of the unit
+    :param symbols: symbol table containing at least the shared profiles, to resolve infoLinks with
+    :param ns: the namespace to use
+    :param projection: PROJECTION_ABILITIES to only parse name and abilities, PROJECTION_STATS to add characteristics and keywords
+                       or PROJECTION_FULL to also parse weapons, skipped parts are None or empty (Optional, defaults to PROJECTION_FULL)
+    :return: the unit
+    """
+    with_stats = projection != PROJECTION_ABILITIES
+    with_weapons = projection == PROJECTION_FULL
     keyword_separator = ","
     unit_identifier = "Unit"
     manifestation_identifier = "Manifestation"
     ability_identifier = "Ability"
 
-    for entry in shared_sel_entries:
-        unit_keywords = keyword_separator.join([non_safe_ascii_parsing(link.get("name")) for link in entry.find("bs:categoryLinks", namespaces=ns)])
-        profiles = entry.findall("bs:profiles/bs:profile", namespaces=ns)
-
-        # Store parts of a unit in a dict for later object creation
-        unit_components = {"abilities": []}
-        # Get information about unit characteristics and abilities
-        for profile in profiles:
+    unit_keywords = None
+    if with_stats:
+        unit_keywords = keyword_separator.join([non_safe_ascii_parsing(link.get("name")) for link in entry.iterfind("bs:categoryLinks/bs:categoryLink", namespaces=ns)])
+    profiles = entry.findall("bs:profiles/bs:profile", namespaces=ns)
 
-            if ability_identifier in non_safe_ascii_parsing(profile.get("typeName")):
-                unit_components["abilities"].append(build_ability_from_profile(profile, ns))
+    # Store parts of a unit in a dict for later object creation
+    unit_components = dict.fromkeys(["move", "health", "save", "control", "banishment"])
+    unit_components["abilities"] = []
+    # Get information about unit characteristics and abilities
+    for profile in profiles:
+        type_name = non_safe_ascii_parsing(profile.get("typeName"))
 
-            elif any(s in non_safe_ascii_parsing(profile.get("typeName")) for s in [unit_identifier, manifestation_identifier]):
-                characteristics = get_characteristics_dict(profile, ns)
-                unit_components["name"] = non_safe_ascii_parsing(entry.get("name"))
-                unit_components["move"] = non_safe_ascii_parsing(characteristics.get("Move"))
-                unit_components["health"] = non_safe_ascii_parsing(characteristics.get("Health"))
-                unit_components["save"] = non_safe_ascii_parsing(characteristics.get("Save"))
-                unit_components["control"] = non_safe_ascii_parsing(characteristics.get("Control"))
-                unit_components["banishment"] = non_safe_ascii_parsing(characteristics.get("Banishment"))
+        if ability_identifier in type_name:
+            unit_components["abilities"].append(build_ability_from_profile(profile, ns))
 
-            else:
+        elif unit_identifier in type_name or manifestation_identifier in type_name:
+            unit_components["name"] = non_safe_ascii_parsing(entry.get("name"))
+            if not with_stats:
                 continue
 
-        # Some units (i.e. Skaven weapons teams have shared rules which are not directly found in their profile)
-        if (info_link := entry.find("bs:infoLinks/bs:infoLink", namespaces=ns)) is not None:
-            ability_cross_name = info_link.get("name")
-
-            # Some universal abilities like "Beast" cannot be found in faction file. They will be ignored.
-            ability_profile = None
-            if shared_profiles:
-                ability_profile = shared_profiles.xpath(f"bs:profile[@name = '{ability_cross_name}']", namespaces=ns)
-            if ability_profile:
-                unit_components["abilities"].append(build_ability_from_profile(ability_profile[0], ns))
-
-        # Get information about weapons
-        weapons, additional_abilities = get_weapon_profiles(entry, ns)
-        unit_components["abilities"].extend(additional_abilities)
-
-        units.append(Unit(
-            unit_components["name"],
-            unit_components["move"],
-            unit_components["health"],
-            unit_components["control"],
-            unit_components["banishment"],
-            unit_components["save"],
-            unit_keywords,
-            weapons,
-            unit_components["abilities"]
-        ))
+            characteristics = get_characteristics_dict(profile, ns)
+            unit_components["move"] = non_safe_ascii_parsing(characteristics.get("Move"))
+            unit_components["health"] = non_safe_ascii_parsing(characteristics.get("Health"))
+            unit_components["save"] = non_safe_ascii_parsing(characteristics.get("Save"))
+            unit_components["control"] = non_safe_ascii_parsing(characteristics.get("Control"))
+            unit_components["banishment"] = non_safe_ascii_parsing(characteristics.get("Banishment"))
 
-    return units
+        else:
+            continue
+
+    # Some units (i.e. Skaven weapons teams have shared rules which are not directly found in their profile)
+    if (info_link := entry.find("bs:infoLinks/bs:infoLink", namespaces=ns)) is not None:
+        # Some universal abilities like "Beast" cannot be found in faction file. They will be ignored.
+        ability_profile = symbols.resolve_profile(info_link.get("targetId"), info_link.get("name"), "sharedProfiles")
+        if ability_profile is not None:
+            unit_components["abilities"].append(build_ability_from_profile(ability_profile, ns))
+
+    # Get information about weapons
+    weapons, additional_abilities = get_weapon_profiles(entry, ns, with_weapons)
+    unit_components["abilities"].extend(additional_abilities)
+
+    return Unit(
+        unit_components["name"],
+        unit_components["move"],
+        unit_components["health"],
+        unit_components["control"],
+        unit_components["banishment"],
+        unit_components["save"],
+        unit_keywords,
+        weapons,
+        unit_components["abilities"]
+    )
 
 
-def get_weapon_profiles(unit_entry, ns: dict[str, str]) -> tuple[list[Weapon], list[Ability]]:
+def get_weapon_profiles(unit_entry, ns: dict[str, str], with_weapons: bool = True) -> tuple[list[Weapon], list[Ability]]:
     """
     Gets the available weapon profiles for a given unit entry along with any special abilities granted by those weapons.
     :param unit_entry: xml unit entry
     :param ns: the namespace to use
+    :param with_weapons: whether to parse the weapon profiles, otherwise only the abilities are returned (Optional, defaults to True)
     :return: list of weapon profiles and list of abilities
     """
     weapons = []
@@ -357,6 +869,9 @@ def get_weapon_profiles(unit_entry, ns: dict[str, str]) -> tuple[list[Weapon], l
             if (profile := option.find("bs:profiles/bs:profile", namespaces=ns)) is not None:
                 additional_abilities.append(build_ability_from_profile(profile, ns))
 
+            if not with_weapons:
+                continue
+
             weapons_available = option.findall("bs:selectionEntries/bs:selectionEntry", namespaces=ns)
             weapons = []
             for weapon in weapons_available:
@@ -426,14 +941,27 @@ def get_cost_key(characteristics: dict[str,str]) -> str:
 
 def non_safe_ascii_parsing(text: str | None):
     """
-    Parses a Unicode string to ASCII using anyascii.anyascii and handles None inputs
+    Parses a Unicode string to ASCII using anyascii.anyascii and handles None inputs.
+    Results are interned, so repeated values like keywords and type names share one instance across all parsed objects.
     :param text: The text to parse
     :return: parsed text or None if None was given
     """
     if text is None:
         return None
 
-    return anyascii(text)
+    # Most of the catalogue text is ASCII already and does not need to be converted
+    if text.isascii():
+        return sys.intern(text)
+
+    return _to_interned_ascii(text)
+
+
+@lru_cache(maxsize=NON_ASCII_CACHE_SIZE)
+def _to_interned_ascii(text: str) -> str:
+    """
+    Helper to convert and intern a non-ASCII string, remembering the conversions of recently seen strings.
+    """
+    return sys.intern(anyascii(text))
 
 
 def parse_weapon_entries(selection_entry, ns):
@@ -1,142 +1,662 @@
 import requests
-from pathlib import Path
+from requests.adapters import HTTPAdapter
+from pathlib import Path, PurePosixPath
 import json
+import os
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from typing import Callable
 
 from src.constants import DEFAULT_BASE_DIR
 from src.logging_config import get_logger_for_package
-from .constants import DATA_FILE_EXTENSION, SEPARATOR, UNIT_FILE_TOKEN, REPO_API_URL, RAW_BASE
+from .constants import DATA_FILE_EXTENSION, SEPARATOR, LORES_FILE_NAME, DEFAULT_DOWNLOAD_WORKERS, DOWNLOAD_CHUNK_SIZE, REPO_CACHE_FILE_NAME, DOWNLOAD_METADATA_FILE_NAME, PARTIAL_DOWNLOAD_SUFFIX, REGIMENTS_OF_RENOWN_TOKEN, PROGRESS_REPORT_INTERVAL
+from .download_metadata import DownloadMetadata
+from .data_sources import get_data_source, git_blob_sha, LocalFileAdapter
+from .catalogue_storage import is_catalogue, is_compressed, catalogue_name, storage_path, find_catalogue, open_catalogue_for_writing, remove_other_variant
+from .manifest import CatalogueManifest, update_manifest
+from .faction_cache import clear_faction_cache
 
 logger = get_logger_for_package(__package__.split('.')[-1])
 
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_download_workers = DEFAULT_DOWNLOAD_WORKERS
+
+
+class DownloadVerificationError(requests.exceptions.RequestException):
+    """
+    Raised if a downloaded file does not have the expected length or hash.
+    """
+
+
+@dataclass(frozen=True)
+class DownloadProgress:
+    """
+    Snapshot of a running download, has attributes file: str, file_bytes_done: int, file_bytes_total: int | None, files_done: int, files_total: int, bytes_done: int, bytes_total: int
+    """
+    file: str
+    file_bytes_done: int
+    file_bytes_total: int | None  # None if the server did not send a Content-Length
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int  # Sum of the file sizes known so far, grows while downloads start
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """
+    Result of syncing a data directory against the upstream tree, has attributes added: list[str], changed: list[str], removed: list[str], unchanged: list[str], failed: list[str]
+    """
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)  # Removed upstream, only deleted locally when pruning
+    unchanged: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+    @property
+    def changed_factions(self) -> set[str]:
+        """
+        Get the names of the factions whose files were added, changed or removed
+        :return: set of faction names
+        """
+        return {
+            file.removesuffix(DATA_FILE_EXTENSION).split(SEPARATOR)[0].strip()
+            for file in self.added + self.changed + self.removed
+        }
+
+
+class _ProgressTracker:
+    """
+    Thread-safe aggregation of per-file progress into DownloadProgress snapshots.
+    Starting and finishing a file is always reported, received chunks at most every PROGRESS_REPORT_INTERVAL seconds.
+    """
+    def __init__(self, files_total: int, callback: Callable[[DownloadProgress], None] | None):
+        """
+        Constructor.
+        :param files_total: the number of files in the download
+        :param callback: called with every new DownloadProgress (None to disable reporting)
+        """
+        self._lock = threading.Lock()
+        self._callback = callback
+        self._files_total = files_total
+        self._files_done = 0
+        self._bytes_done = 0
+        self._bytes_total = 0
+        self._last_report = 0.0
+
+    def start_file(self, file: str, size: int | None):
+        """
+        Registers the start of a file download.
+        :param file: the filename
+        :param size: the size of the file if known
+        """
+        with self._lock:
+            self._bytes_total += size or 0
+            snapshot = self._snapshot(file, 0, size)
+        self._report(snapshot)
+
+    def advance(self, file: str, file_bytes_done: int, file_bytes_total: int | None, chunk_size: int):
+        """
+        Registers a received chunk of a file, only reported if no progress was reported within PROGRESS_REPORT_INTERVAL.
+        :param file: the filename
+        :param file_bytes_done: bytes of the file received so far
+        :param file_bytes_total: the size of the file if known
+        :param chunk_size: size of the received chunk
+        """
+        with self._lock:
+            self._bytes_done += chunk_size
+            now = time.monotonic()
+            if now - self._last_report < PROGRESS_REPORT_INTERVAL:
+                return
+            self._last_report = now
+            snapshot = self._snapshot(file, file_bytes_done, file_bytes_total)
+        self._report(snapshot)
+
+    def finish_file(self, file: str, file_bytes_done: int, file_bytes_total: int | None):
+        """
+        Registers a completed file download.
+        :param file: the filename
+        :param file_bytes_done: bytes of the file received
+        :param file_bytes_total: the size of the file if known
+        """
+        with self._lock:
+            self._files_done += 1
+            snapshot = self._snapshot(file, file_bytes_done, file_bytes_total)
+        self._report(snapshot)
+
+    def _snapshot(self, file: str, file_bytes_done: int, file_bytes_total: int | None) -> DownloadProgress:
+        """
+        Helper to create a DownloadProgress of the current state, must be called while holding the lock.
+        """
+        return DownloadProgress(file, file_bytes_done, file_bytes_total, self._files_done, self._files_total, self._bytes_done, max(self._bytes_total, self._bytes_done))
+
+    def _report(self, snapshot: DownloadProgress):
+        """
+        Helper to pass a snapshot to the callback outside the lock.
+        """
+        if self._callback is not None:
+            self._callback(snapshot)
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared keep-alive session used for all requests to the data repo, creating it on first use.
+    :return: the shared requests.Session
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _mount_http_adapter(_session, _download_workers)
+            _session.mount("file://", LocalFileAdapter())
+
+    return _session
+
+
+def _mount_http_adapter(session: requests.Session, max_workers: int):
+    """
+    Helper to mount an HTTP adapter whose connection pool is large enough for the given number of concurrent downloads.
+    """
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers * 4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def set_download_workers(max_workers: int):
+    """
+    Sets the maximum number of concurrent downloads used if none is given, including for downloads started when parsing a faction with missing files.
+    :param max_workers: the new maximum, values below 1 are treated as 1
+    """
+    global _download_workers
+
+    with _session_lock:
+        _download_workers = max(1, int(max_workers))
+        if _session is not None:
+            # Requests still running keep the connections of the previous adapter
+            _mount_http_adapter(_session, _download_workers)
+
+
+def get_download_workers() -> int:
+    """
+    Returns the maximum number of concurrent downloads used if none is given.
+    :return: the configured maximum
+    """
+    return _download_workers
+
 
 def get_repo_files(force_refresh=False, cache_file_location: str | Path=f"{DEFAULT_BASE_DIR}/data") -> list[str]:
     """
-    Returns a list of .cat filenames in the BSData repo.
+    Returns a list of .cat filenames in the data source.
     Uses a cached version unless force_refresh=True or cache >24h old.
+    An outdated cache is revalidated with a conditional request and only fetched again if the listing changed.
     :param force_refresh: whether to force refreshing the cache file or not
     :param cache_file_location: path to cache file (Optional, defaults to ROOT/data)
     :return: list of filenames for the .cat files found in the repo
     """
-    cache_file = Path(cache_file_location) / "repo_cache.json"
+    cache_file = Path(cache_file_location) / REPO_CACHE_FILE_NAME
     if cache_file.exists() and not force_refresh:
         mtime = datetime.fromtimestamp(cache_file.stat().st_mtime)
         if datetime.now() - mtime < timedelta(hours=24):
             logger.info("Using cached file list from %s", str(cache_file))
             return json.load(open(cache_file))
 
-    logger.info("Fetching file list from GitHub API...")
-    response = requests.get(REPO_API_URL)
+    metadata = DownloadMetadata(cache_file_location)
+    headers = metadata.conditional_headers(REPO_CACHE_FILE_NAME) if cache_file.exists() else {}
+
+    source = get_data_source()
+    logger.info("Fetching file list from %s...", source.listing_url)
+    response = get_session().get(source.listing_url, headers=headers)
+    if response.status_code == 304:
+        # Listing did not change, mark the cache as fresh again
+        os.utime(cache_file)
+        logger.info("File list unchanged, using cached file list from %s", str(cache_file))
+        return json.load(open(cache_file))
+
     if response.status_code != 200:
         logger.critical(
             "Failed to fetch repo contents: %s %s", response.status_code, response.text
         )
         raise SystemExit(1)
 
-    files = response.json()
+    # Listings are either GitHub contents entries or plain filenames
+    files = [f if isinstance(f, dict) else {"name": f, "type": "file"} for f in response.json()]
     cat_files = [f["name"] for f in files if f["type"] == "file" and f["name"].endswith(DATA_FILE_EXTENSION)]
 
     cache_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(cache_file, "w") as cache_file:
-        json.dump(cat_files, cache_file)
+    with open(cache_file, "w") as f:
+        json.dump(cat_files, f)
     logger.info("Cached %d file names to %s", len(cat_files), str(cache_file))
 
+    metadata.update(REPO_CACHE_FILE_NAME, response)
+    metadata.save()
+
     return cat_files
 
 
-def download_files(files: list[str], download_location: str | Path = f"{DEFAULT_BASE_DIR}/data") -> list[Path]:
+def download_files(files: list[str], download_location: str | Path = f"{DEFAULT_BASE_DIR}/data", max_workers: int | None = None,
+                   progress_callback: Callable[[DownloadProgress], None] | None = None, conditional: bool = False,
+                   expected_shas: dict[str, str] | None = None) -> list[Path]:
     """
-    Downloads files directly from raw.githubusercontent.com.
+    Downloads files from the data source, using a bounded pool of workers sharing one keep-alive session.
     :param files: list of filenames to download
     :param download_location: directory to download files to (Optional, defaults to src/data)
-    :return: list of filepaths to downloaded files
+    :param max_workers: maximum number of concurrent downloads, None for the configured maximum (Optional, defaults to None)
+    :param progress_callback: called with a DownloadProgress after every chunk, may be called from worker threads (Optional, defaults to None)
+    :param conditional: whether to skip files that are present and unchanged upstream (Optional, defaults to False)
+    :param expected_shas: git blob SHAs to verify the downloaded files against, by filename (Optional, defaults to None)
+    :return: list of filepaths to downloaded (or unchanged) files, in the order of files
     """
     download_location = Path(download_location)
-    filepaths = []
+    download_location.mkdir(parents=True, exist_ok=True)
+    session = get_session()
+    metadata = DownloadMetadata(download_location)
+    tracker = _ProgressTracker(len(files), progress_callback)
+    expected_shas = expected_shas or {}
+    filepaths = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers or _download_workers)) as executor:
+        futures = {
+            executor.submit(_download_file, session, file, storage_path(download_location, file), tracker, metadata, conditional, expected_shas.get(file)): file
+            for file in files
+        }
+
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                filepaths[file] = future.result()
+            except requests.exceptions.RequestException as e:
+                logger.error("Failed to download %s: %s", file, e)
+
+    metadata.save()
+    update_manifest(download_location)
+
+    return [filepaths[file] for file in files if file in filepaths]
+
+
+def _download_file(session: requests.Session, file: str, path: Path, tracker: _ProgressTracker, metadata: DownloadMetadata, conditional: bool,
+                   expected_sha: str | None = None) -> Path:
+    """
+    Downloads a single file, reporting progress to the given tracker and recording its validators in metadata.
+    The file is written to a partial file first, which is resumed with a range request if a previous download was interrupted,
+    and only moved to path once it is complete and verified.
+    :param session: the session to use for the request
+    :param file: the filename in the data repo
+    :param path: the path to write the file to, compressing it if it has a compression suffix
+    :param tracker: the progress tracker of the running download
+    :param metadata: the download metadata of the download location
+    :param conditional: whether to send a conditional request if the file is present
+    :param expected_sha: the git blob SHA the downloaded file has to match (Optional, defaults to None)
+    :return: the path of the downloaded file, or of the present variant if it is unchanged
+    """
+    url = get_data_source().file_url(file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = path.with_name(path.name + PARTIAL_DOWNLOAD_SUFFIX)
+    existing = find_catalogue(path.parent, file)
+    headers = metadata.conditional_headers(file) if conditional and existing is not None else {}
+
+    if is_compressed(part_path) and part_path.is_file():
+        # Offsets into a gzip stream do not map to the content, so compressed downloads cannot be resumed
+        part_path.unlink()
+        metadata.remove(part_path.name)
+
+    offset = part_path.stat().st_size if part_path.is_file() else 0
+    validator = metadata.range_validator(part_path.name) if offset else None
+    if offset and validator is None:
+        # Without a validator an unconditional range request could append the rest of a changed file to the old start
+        logger.info("No validator known for partial download of %s, restarting download.", file)
+        part_path.unlink()
+        offset = 0
+
+    if offset:
+        # Byte offsets of the partial file refer to the unencoded content
+        headers["Range"] = f"bytes={offset}-"
+        headers["Accept-Encoding"] = "identity"
+        headers["If-Range"] = validator
+
+    logger.info("Downloading %s ...", url)
+    with session.get(url, stream=True, headers=headers) as response:
+        if response.status_code == 304:
+            logger.info("%s is unchanged, skipping download.", file)
+            metadata.update(file, response)
+            tracker.start_file(file, 0)
+            tracker.finish_file(file, 0, 0)
+            return existing
+
+        if response.status_code == 416 or (response.status_code == 206 and _get_range_start(response) != offset):
+            # The partial file cannot be resumed from the returned range, start over
+            logger.info("Cannot resume %s, restarting download.", file)
+            part_path.unlink()
+            metadata.remove(part_path.name)
+            return _download_file(session, file, path, tracker, metadata, conditional, expected_sha)
+
+        response.raise_for_status()
+
+        if response.status_code == 206:
+            logger.info("Resuming download of %s at byte %d", file, offset)
+            size = _get_range_total(response)
+            mode = "ab"
+        else:
+            offset = 0
+            size = int(response.headers["Content-Length"]) if "Content-Length" in response.headers and "Content-Encoding" not in response.headers else None
+            mode = "wb"
+            # The validator is saved before writing, so the partial file can be resumed safely after a crash
+            metadata.remove(part_path.name)
+            metadata.update(part_path.name, response)
+            metadata.save()
+
+        tracker.start_file(file, size)
+        tracker.advance(file, offset, size, offset)
+
+        done = offset
+        with open_catalogue_for_writing(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                done += len(chunk)
+                tracker.advance(file, done, size, len(chunk))
+
+    _verify_download(part_path, size, expected_sha, done)
+    os.replace(part_path, path)
+    remove_other_variant(path)
+
+    metadata.remove(part_path.name)
+    metadata.update(file, response)
+    tracker.finish_file(file, done, size)
+    logger.info("Downloaded %s successfully.", file)
+
+    return path
+
+
+def _get_range_start(response: requests.Response) -> int | None:
+    """
+    Helper to read the first byte position from the Content-Range header of a partial response.
+    :param response: the partial response
+    :return: the first byte position, None if the header is missing or malformed
+    """
+    content_range = response.headers.get("Content-Range", "")
+    try:
+        return int(content_range.removeprefix("bytes ").split("-")[0])
+    except ValueError:
+        return None
 
-    for file in files:
-        url = f"{RAW_BASE}/{file}"
-        path = download_location / file
-        path.parent.mkdir(parents=True, exist_ok=True)
 
-        try:
-            logger.info("Downloading %s ...", url)
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
+def _get_range_total(response: requests.Response) -> int | None:
+    """
+    Helper to read the complete length from the Content-Range header of a partial response.
+    :param response: the partial response
+    :return: the complete length, None if it is unknown
+    """
+    total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+    return int(total) if total.isdigit() else None
 
-            with path.open("wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
 
-            filepaths.append(path)
-            logger.info("Downloaded %s successfully.", file)
-        except requests.exceptions.RequestException as e:
-            logger.error("Failed to download %s: %s", file, e)
+def _verify_download(part_path: Path, size: int | None, expected_sha: str | None, received: int | None = None):
+    """
+    Helper to verify a completed partial file, deleting it if it is corrupt.
+    :param part_path: path of the partial file
+    :param size: expected length in bytes, None to skip the check
+    :param expected_sha: expected git blob SHA, None to skip the check
+    :param received: uncompressed bytes written, None to use the size of the file (Optional, defaults to None)
+    :raises DownloadVerificationError: if the file does not match
+    """
+    error = None
+    received = part_path.stat().st_size if received is None else received
+    if size is not None and received != size:
+        error = f"expected {size} bytes but received {received}"
+    elif expected_sha is not None and (sha := git_blob_sha(part_path)) != expected_sha:
+        error = f"expected blob SHA {expected_sha} but received {sha}"
 
-    return filepaths
+    if error is not None:
+        part_path.unlink()
+        raise DownloadVerificationError(f"Verification of {part_path.name} failed: {error}")
 
 
-def redownload_files(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data"):
+def redownload_files(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data", max_workers: int | None = None,
+                     progress_callback: Callable[[DownloadProgress], None] | None = None):
     """
-    Re-downloads all files present in the given location.
+    Re-downloads all files present in the given location, skipping files which did not change upstream.
     :param download_location: directory in which the files to re-download are located. (Optional, defaults to src/data)
+    :param max_workers: maximum number of concurrent downloads, None for the configured maximum (Optional, defaults to None)
+    :param progress_callback: called with a DownloadProgress while downloading (Optional, defaults to None)
     :return: list of filepaths of the re-downloaded files.
     """
     to_download = []
 
     for file in Path(download_location).iterdir():
-        if file.is_file() and file.name.endswith(DATA_FILE_EXTENSION):
-            to_download.append(file.name)
+        if file.is_file() and is_catalogue(file):
+            to_download.append(catalogue_name(file))
 
-    return download_files(to_download, download_location)
+    return download_files(to_download, download_location, max_workers, progress_callback, conditional=True)
 
 
-def download_files_for_faction(faction_name: str, aor_name: str | None=None, download_location: str | Path=f"{DEFAULT_BASE_DIR}/data") -> list[Path]:
+def get_repo_tree() -> dict[str, str]:
+    """
+    Fetches the git tree of the data source in a single request.
+    :return: dict with the .cat filenames as keys and their git blob SHAs as values
+    """
+    source = get_data_source()
+    logger.info("Fetching file tree from %s...", source)
+
+    return source.get_tree(get_session())
+
+
+def sync_files(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data", include_new: bool = True, prune: bool = False,
+               max_workers: int | None = None, progress_callback: Callable[[DownloadProgress], None] | None = None) -> SyncResult:
+    """
+    Brings the data directory up to date with the upstream tree, only downloading files whose blob SHA differs from the local copy.
+    :param download_location: directory in which the files to sync are located. (Optional, defaults to src/data)
+    :param include_new: whether to download files which are not present locally (Optional, defaults to True)
+    :param prune: whether to delete local files which were removed upstream (Optional, defaults to False)
+    :param max_workers: maximum number of concurrent downloads, None for the configured maximum (Optional, defaults to None)
+    :param progress_callback: called with a DownloadProgress while downloading (Optional, defaults to None)
+    :return: SyncResult describing which files were added, changed, removed, unchanged or failed
+    """
+    download_location = Path(download_location)
+    download_location.mkdir(parents=True, exist_ok=True)
+    upstream = get_repo_tree()
+    local = {
+        catalogue_name(file): file for file in download_location.iterdir()
+        if file.is_file() and is_catalogue(file)
+    }
+
+    result = SyncResult()
+    for name, sha in upstream.items():
+        if name not in local:
+            if include_new:
+                result.added.append(name)
+        elif git_blob_sha(local[name]) != sha:
+            result.changed.append(name)
+        else:
+            result.unchanged.append(name)
+
+    result.removed.extend(name for name in local if name not in upstream)
+
+    to_download = result.added + result.changed
+    downloaded = {catalogue_name(path) for path in download_files(to_download, download_location, max_workers, progress_callback, expected_shas=upstream)}
+    result.failed.extend(name for name in to_download if name not in downloaded)
+
+    if prune and result.removed:
+        for name in result.removed:
+            local[name].unlink()
+            logger.info("Deleted file %s as it was removed upstream", local[name])
+        update_manifest(download_location)
+
+    # The tree doubles as an up-to-date file listing
+    with open(download_location / REPO_CACHE_FILE_NAME, "w") as f:
+        json.dump(list(upstream), f)
+
+    logger.info(
+        "Synced %s: %d added, %d changed, %d removed upstream, %d unchanged, %d failed. Changed factions: %s",
+        download_location, len(result.added), len(result.changed), len(result.removed), len(result.unchanged),
+        len(result.failed), ", ".join(sorted(result.changed_factions))
+    )
+
+    return result
+
+
+def download_files_for_faction(faction_name: str, aor_name: str | None=None, download_location: str | Path=f"{DEFAULT_BASE_DIR}/data",
+                               max_workers: int | None = None) -> list[Path]:
     """
     Downloads all files for a given faction and army of renown to the given location.
     :param faction_name: name of the faction to download.
     :param aor_name: name of the AOR to download. (Optional, defaults to None)
     :param download_location: directory to download the files to. (Optional, defaults to src/data)
+    :param max_workers: maximum number of concurrent downloads, None for the configured maximum (Optional, defaults to None)
     :return: filepaths of the downloaded files.
     """
-    files = get_repo_files(cache_file_location=download_location)
+    manifest = CatalogueManifest.from_filenames(get_repo_files(cache_file_location=download_location))
 
     # Find files that match the given params
     matching_files = []
-    for file in files:
-        if not file.endswith(DATA_FILE_EXTENSION):
-            continue
-
-        parts = file.removesuffix(DATA_FILE_EXTENSION).split(SEPARATOR)
-        file_faction = parts[0].strip()
-        file_aor = parts[1].strip() if len(parts) > 1 else ""
+    if (dataset_faction := manifest.find_faction(faction_name)) is not None:
+        faction_file, unit_file, aor_file = manifest.resolve(dataset_faction, aor_name)
+        matching_files = [file for file in (faction_file, unit_file, aor_file) if file is not None]
 
-        if faction_name not in file_faction:
-            continue
+    if matching_files:
+        matching_files.append(manifest.lores or LORES_FILE_NAME)
 
-        if aor_name is None and file_aor not in ["", UNIT_FILE_TOKEN]:
-            continue
+    logger.debug("Found %d files for %s: %s", len(matching_files), faction_name, ", ".join(matching_files))
 
-        if aor_name is not None and file_aor not in ["", UNIT_FILE_TOKEN] and file_aor not in aor_name:
-            continue
+    return download_files(matching_files, download_location, max_workers)
 
-        matching_files.append(file)
 
-    if matching_files:
-        matching_files.append("Lores.cat")
+def download_regiments_of_renown_files(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data", max_workers: int | None = None) -> list[Path]:
+    """
+    Downloads the catalogues defining regiments of renown to the given location.
+    :param download_location: directory to download the files to. (Optional, defaults to src/data)
+    :param max_workers: maximum number of concurrent downloads, None for the configured maximum (Optional, defaults to None)
+    :return: filepaths of the downloaded files.
+    """
+    matching_files = [file for file in get_repo_files(cache_file_location=download_location) if REGIMENTS_OF_RENOWN_TOKEN in file]
 
-    logger.debug("Found %d files for %s: %s", len(matching_files), faction_name, ", ".join(matching_files))
+    logger.debug("Found %d regiments of renown files: %s", len(matching_files), ", ".join(matching_files))
 
-    return download_files(matching_files, download_location)
+    return download_files(matching_files, download_location, max_workers)
 
 
-def download_all_faction_files(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data"):
+def download_all_faction_files(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data", max_workers: int | None = None,
+                               progress_callback: Callable[[DownloadProgress], None] | None = None, use_archive: bool = False,
+                               archive_source: str | Path | None = None):
     """
     Downloads all available faction files.
     :param download_location: directory to download the files to. (Optional, defaults to src/data)
+    :param max_workers: maximum number of concurrent downloads, None for the configured maximum (Optional, defaults to None)
+    :param progress_callback: called with a DownloadProgress while downloading (Optional, defaults to None)
+    :param use_archive: whether to extract the files from a single repo archive instead of downloading them one by one (Optional, defaults to False)
+    :param archive_source: URL or local path of the archive, None for the upstream tarball (Optional, defaults to None)
     """
+    if use_archive and (archive_source or get_data_source().archive_url):
+        return download_archive(download_location, archive_source, progress_callback)
+    if use_archive:
+        logger.warning("Data source %s does not provide an archive, downloading files one by one", get_data_source())
+
     files = get_repo_files(force_refresh=True, cache_file_location=download_location)
-    return download_files(files, download_location)
+    return download_files(files, download_location, max_workers, progress_callback)
+
+
+def download_archive(download_location: str | Path = f"{DEFAULT_BASE_DIR}/data", source: str | Path | None = None,
+                     progress_callback: Callable[[DownloadProgress], None] | None = None) -> list[Path]:
+    """
+    Extracts the top level .cat files of a repo archive into the download location.
+    Remote archives have to be tarballs and are extracted while streaming, without storing the archive.
+    Local archives may be tarballs or zip files.
+    :param download_location: directory to extract the files to. (Optional, defaults to src/data)
+    :param source: URL or local path of the archive, None for the tarball of the data source (Optional, defaults to None)
+    :param progress_callback: called with a DownloadProgress while extracting, files_total is 0 as it is unknown (Optional, defaults to None)
+    :return: list of filepaths of the extracted files
+    """
+    download_location = Path(download_location)
+    download_location.mkdir(parents=True, exist_ok=True)
+    source = source or get_data_source().archive_url
+    if source is None:
+        raise ValueError(f"Data source {get_data_source()} does not provide an archive")
+    tracker = _ProgressTracker(0, progress_callback)
+
+    if isinstance(source, Path) or not str(source).startswith(("http://", "https://")):
+        logger.info("Extracting data files from local archive %s ...", source)
+        if zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                members = ((info.filename, info.file_size, lambda info=info: archive.open(info)) for info in archive.infolist() if not info.is_dir())
+                filepaths = _extract_archive_members(members, download_location, tracker)
+        else:
+            with tarfile.open(source, mode="r|*") as archive:
+                filepaths = _extract_archive_members(_iter_tar_members(archive), download_location, tracker)
+    else:
+        logger.info("Downloading and extracting archive %s ...", source)
+        with get_session().get(source, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with tarfile.open(fileobj=response.raw, mode="r|*") as archive:
+                filepaths = _extract_archive_members(_iter_tar_members(archive), download_location, tracker)
+
+    # Extracted files replace any previous downloads, so their validators are outdated
+    metadata = DownloadMetadata(download_location)
+    for path in filepaths:
+        metadata.remove(catalogue_name(path))
+    metadata.save()
+
+    with open(download_location / REPO_CACHE_FILE_NAME, "w") as f:
+        json.dump([catalogue_name(path) for path in filepaths], f)
+    update_manifest(download_location)
+
+    logger.info("Extracted %d data files to %s", len(filepaths), download_location)
+
+    return filepaths
+
+
+def _iter_tar_members(archive: tarfile.TarFile):
+    """
+    Helper to iterate over the regular files of a tar archive opened in streaming mode.
+    :param archive: the tar archive
+    :return: generator yielding tuples of member name, size and a callable opening the member
+    """
+    for member in archive:
+        if member.isfile():
+            yield member.name, member.size, lambda member=member: archive.extractfile(member)
+
+
+def _extract_archive_members(members, download_location: Path, tracker: _ProgressTracker) -> list[Path]:
+    """
+    Helper to write the top level .cat members of an archive to the download location.
+    Members are only opened if they are extracted, so streamed archives skip the others without reading them into memory.
+    :param members: iterable of tuples of member name, size and a callable opening the member
+    :param download_location: directory to extract the files to
+    :param tracker: the progress tracker of the running extraction
+    :return: list of filepaths of the extracted files
+    """
+    filepaths = []
+
+    for name, size, open_member in members:
+        member_path = PurePosixPath(name)
+
+        # GitHub archives contain a single root directory, anything nested deeper is not a catalogue of the repo
+        if member_path.suffix != DATA_FILE_EXTENSION or len(member_path.parts) > 2:
+            continue
+
+        file = member_path.name
+        path = storage_path(download_location, file)
+        part_path = path.with_name(path.name + PARTIAL_DOWNLOAD_SUFFIX)
+        tracker.start_file(file, size)
+        with open_member() as src, open_catalogue_for_writing(part_path) as dst:
+            shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+            received = dst.tell()
+        _verify_download(part_path, size, None, received)
+        os.replace(part_path, path)
+        remove_other_variant(path)
+        tracker.advance(file, size, size, size)
+        tracker.finish_file(file, size, size)
+
+        filepaths.append(path)
+        logger.info("Extracted %s successfully.", file)
+
+    return filepaths
 
 
 def delete_all_faction_files(data_location: str | Path = f"{DEFAULT_BASE_DIR}/data"):
@@ -145,6 +665,11 @@ def delete_all_faction_files(data_location: str | Path = f"{DEFAULT_BASE_DIR}/da
     :param data_location: directory in which the files to delete are located. (Optional, defaults to src/data)
     """
     for file in Path(data_location).iterdir():
-        if file.is_file() and file.name.endswith(DATA_FILE_EXTENSION):
+        if file.is_file() and (is_catalogue(file) or is_catalogue(file.name.removesuffix(PARTIAL_DOWNLOAD_SUFFIX))):
             file.unlink()
-            logger.info("Deleted file %s", file)
\ No newline at end of file
+            logger.info("Deleted file %s", file)
+
+    # Validators of deleted files must not be used for conditional requests anymore
+    (Path(data_location) / DOWNLOAD_METADATA_FILE_NAME).unlink(missing_ok=True)
+    clear_faction_cache(data_location)
+    update_manifest(data_location)
\ No newline at end of file
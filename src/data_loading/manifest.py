@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from src.logging_config import get_logger_for_package
+from .catalogue_storage import is_catalogue, catalogue_name
+from .constants import DATA_FILE_EXTENSION, SEPARATOR, UNIT_FILE_TOKEN, LORES_FILE_NAME, MANIFEST_FILE_NAME, AOR_NAME_ALIASES
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+_manifest_cache: dict[Path, tuple[int, "CatalogueManifest"]] = {}
+_manifest_cache_lock = threading.Lock()
+
+
+class CatalogueManifest:
+    """
+    Index of catalogue files mapping each faction to its base file, unit library and army of renown files.
+    Also holds an alias table for army of renown names that differ between the app and the dataset.
+    """
+    def __init__(self, factions: dict[str, dict] | None = None, aliases: dict[str, str] | None = None, lores: str | None = None):
+        """
+        Constructor.
+        :param factions: dict with faction names as keys and dicts with the keys base, library and armies_of_renown as values (Optional, defaults to None)
+        :param aliases: dict mapping army of renown names used in lists to the names used in the dataset (Optional, defaults to None)
+        :param lores: filename of the lore catalogue (Optional, defaults to None)
+        """
+        self.factions = factions or {}
+        self.aliases = dict(AOR_NAME_ALIASES) | (aliases or {})
+        self.lores = lores
+
+    @classmethod
+    def from_filenames(cls, files: list[str], aliases: dict[str, str] | None = None) -> "CatalogueManifest":
+        """
+        Builds a manifest from catalogue filenames.
+        :param files: the filenames, compressed catalogues are indexed under their stored filename
+        :param aliases: known aliases to keep (Optional, defaults to None)
+        :return: the CatalogueManifest
+        """
+        manifest = cls(aliases=aliases)
+
+        for file in files:
+            if not is_catalogue(file):
+                continue
+            name = catalogue_name(file)
+            if name == LORES_FILE_NAME:
+                manifest.lores = file
+                continue
+
+            parts = [part.strip() for part in name.removesuffix(DATA_FILE_EXTENSION).split(SEPARATOR)]
+            entry = manifest.factions.setdefault(parts[0], {"base": None, "library": None, "armies_of_renown": {}})
+
+            if len(parts) == 1:
+                entry["base"] = file
+            elif parts[-1] == UNIT_FILE_TOKEN:
+                entry["library"] = file
+            else:
+                entry["armies_of_renown"][SEPARATOR.join(parts[1:])] = file
+
+        return manifest
+
+    @classmethod
+    def from_directory(cls, data_path: str | Path, aliases: dict[str, str] | None = None) -> "CatalogueManifest":
+        """
+        Builds a manifest from the catalogues present in a directory.
+        :param data_path: the directory
+        :param aliases: known aliases to keep (Optional, defaults to None)
+        :return: the CatalogueManifest
+        """
+        data_path = Path(data_path)
+        files = [file.name for file in data_path.iterdir() if file.is_file()] if data_path.is_dir() else []
+
+        return cls.from_filenames(files, aliases)
+
+    def find_faction(self, faction_name: str) -> str | None:
+        """
+        Finds the dataset name of a faction.
+        :param faction_name: the faction name
+        :return: the faction name in the dataset, None if the faction is unknown
+        """
+        if faction_name in self.factions:
+            return faction_name
+
+        # Fall back to the lenient matching used for the repo listing, e.g. for split battletomes
+        return next((name for name in self.factions if faction_name in name), None)
+
+    def resolve_aor(self, faction_name: str, aor_name: str) -> str | None:
+        """
+        Finds the file of an army of renown, learning an alias if the name only matches partially.
+        :param faction_name: the faction name
+        :param aor_name: the army of renown name as used in the list
+        :return: the filename of the army of renown, None if it is unknown
+        """
+        entry = self.factions.get(faction_name)
+        if entry is None:
+            return None
+
+        armies_of_renown = entry["armies_of_renown"]
+        if aor_name in armies_of_renown:
+            return armies_of_renown[aor_name]
+        if (alias := self.aliases.get(aor_name)) in armies_of_renown:
+            return armies_of_renown[alias]
+
+        # Some Armies of Renown have different names in the official App than the dataset (The Knights of New Summercourt vs New Summercourt)
+        for dataset_name, file in armies_of_renown.items():
+            if dataset_name in aor_name:
+                logger.info("Learned alias %s for army of renown %s", dataset_name, aor_name)
+                self.aliases[aor_name] = dataset_name
+                return file
+
+        return None
+
+    def resolve(self, faction_name: str, aor_name: str | None = None) -> tuple[str | None, str | None, str | None]:
+        """
+        Finds the files needed to parse a faction and army of renown.
+        :param faction_name: the faction name
+        :param aor_name: the army of renown name (Optional, defaults to None)
+        :return: the filenames of the faction file, unit file and army of renown file, each None if unknown
+        """
+        entry = self.factions.get(faction_name, {})
+        aor_file = self.resolve_aor(faction_name, aor_name) if aor_name else None
+
+        return entry.get("base"), entry.get("library"), aor_file
+
+    def save(self, data_path: str | Path):
+        """
+        Writes the manifest to the data directory, replacing the file at once so readers never see it half written.
+        :param data_path: the data directory
+        """
+        path = Path(data_path) / MANIFEST_FILE_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"factions": self.factions, "aliases": self.aliases, "lores": self.lores}, f)
+        os.replace(tmp_path, path)
+
+        with _manifest_cache_lock:
+            _manifest_cache[path.resolve()] = (path.stat().st_mtime_ns, self)
+
+
+def load_manifest(data_path: str | Path) -> CatalogueManifest:
+    """
+    Returns the manifest of a data directory, building and saving it if it does not exist yet.
+    Loaded manifests are kept in memory until the file changes.
+    :param data_path: the data directory
+    :return: the CatalogueManifest
+    """
+    manifest = _read_manifest(data_path)
+    if manifest is None:
+        manifest = update_manifest(data_path)
+
+    return manifest
+
+
+def update_manifest(data_path: str | Path) -> CatalogueManifest:
+    """
+    Rebuilds the manifest of a data directory from the files present, keeping learned aliases.
+    :param data_path: the data directory
+    :return: the new CatalogueManifest
+    """
+    previous = _read_manifest(data_path)
+    manifest = CatalogueManifest.from_directory(data_path, previous.aliases if previous else None)
+    if Path(data_path).is_dir():
+        manifest.save(data_path)
+
+    logger.debug("Updated manifest of %s with %d factions", data_path, len(manifest.factions))
+
+    return manifest
+
+
+def _read_manifest(data_path: str | Path) -> CatalogueManifest | None:
+    """
+    Helper to read the manifest file of a data directory, using the in-memory copy if the file did not change.
+    :param data_path: the data directory
+    :return: the CatalogueManifest, None if there is no readable manifest
+    """
+    path = (Path(data_path) / MANIFEST_FILE_NAME).resolve()
+    if not path.is_file():
+        return None
+
+    mtime = path.stat().st_mtime_ns
+    with _manifest_cache_lock:
+        cached = _manifest_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        manifest = CatalogueManifest(data["factions"], data["aliases"], data["lores"])
+    except (OSError, KeyError, json.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable manifest %s: %s", path, e)
+        return None
+
+    with _manifest_cache_lock:
+        _manifest_cache[path] = (mtime, manifest)
+
+    return manifest
@@ -0,0 +1,175 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from src.constants import DEFAULT_BASE_DIR
+from src.logging_config import get_logger_for_package
+from .constants import LORES_FILE_NAME, PRECOMPILE_REPORT_FILE_NAME
+from .github_downloader import download_files
+from .manifest import update_manifest
+from .faction_parser import parse_files_for_faction
+from .faction_cache import prune_faction_cache
+from .process_settings import get_data_settings, apply_data_settings
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+
+@dataclass(frozen=True)
+class PrecompileResult:
+    """
+    Result of precompiling one faction, has attributes faction: str, army_of_renown: str | None, seconds: float, units: int, abilities: int, weapons: int, error: str | None
+    """
+    faction: str
+    army_of_renown: str | None
+    seconds: float
+    units: int = 0
+    abilities: int = 0
+    weapons: int = 0
+    error: str | None = None  # Set if the faction could not be parsed
+
+
+@dataclass(frozen=True)
+class PrecompileReport:
+    """
+    Report of a precompile sweep, has attributes started: str, seconds: float, workers: int, results: list[PrecompileResult]
+    """
+    started: str
+    seconds: float
+    workers: int
+    results: list[PrecompileResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> list[PrecompileResult]:
+        """
+        Get the results of the factions which could not be parsed
+        :return: list of failed results
+        """
+        return [result for result in self.results if result.error is not None]
+
+    def to_json(self) -> str:
+        """
+        Serializes the report to JSON.
+        :return: JSON string of the report
+        """
+        return json.dumps(asdict(self) | {"failed": len(self.failed)}, indent=2)
+
+
+def precompile_factions(data_path: str | Path = f"{DEFAULT_BASE_DIR}/data", max_workers: int | None = None,
+                        progress_callback: Callable[[int, int], None] | None = None) -> PrecompileReport:
+    """
+    Parses every faction and army of renown present in a data directory in a process pool, filling the faction cache of the directory
+    and pruning outdated entries from it.
+    A report of the parse times, object counts and failures is written to the data directory.
+    :param data_path: the data directory (Optional, defaults to src/data)
+    :param max_workers: the number of processes, None for the number of CPUs (Optional, defaults to None)
+    :param progress_callback: Called with the number of finished and total factions after each faction (Optional, defaults to None)
+    :return: the PrecompileReport
+    """
+    data_path = Path(data_path)
+    manifest = update_manifest(data_path)
+    max_workers = max(1, max_workers or os.cpu_count() or 1)
+
+    if manifest.lores is None:
+        # Download the lores once instead of in every worker
+        download_files([LORES_FILE_NAME], data_path)
+
+    jobs = []
+    for faction_name, entry in sorted(manifest.factions.items()):
+        if entry["base"] is None or entry["library"] is None:
+            # e.g. Regiments of Renown or a partially downloaded faction
+            logger.debug("Not precompiling %s as it has no faction or unit file", faction_name)
+            continue
+        jobs.append((faction_name, None))
+        jobs.extend((faction_name, aor_name) for aor_name in sorted(entry["armies_of_renown"]))
+
+    started = datetime.now()
+    start = time.perf_counter()
+    results = []
+    logger.info("Precompiling %d factions in %s with %d processes", len(jobs), data_path, max_workers)
+
+    if jobs:
+        # Forking a process running a GUI is unsafe, so workers are always spawned and get the data source and storage settings passed
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)), mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=apply_data_settings, initargs=(get_data_settings(),)) as executor:
+            futures = {executor.submit(_precompile_faction, faction_name, aor_name, str(data_path)): (faction_name, aor_name) for faction_name, aor_name in jobs}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Only raised if the worker process itself died
+                    result = PrecompileResult(*futures[future], 0.0, error=f"{type(e).__name__}: {e}")
+                if result.error is not None:
+                    logger.error("Failed to precompile %s - %s: %s", result.faction, result.army_of_renown, result.error)
+                results.append(result)
+                if progress_callback is not None:
+                    progress_callback(len(results), len(jobs))
+
+    # Entries of catalogues which were updated or deleted, or of an older parser, are never read again
+    prune_faction_cache(data_path)
+
+    results.sort(key=lambda result: (result.faction, result.army_of_renown or ""))
+    report = PrecompileReport(started.isoformat(timespec="seconds"), round(time.perf_counter() - start, 3), max_workers, results)
+    _write_report(data_path, report)
+
+    logger.info("Precompiled %d factions in %.1f s, %d failed", len(results), report.seconds, len(report.failed))
+
+    return report
+
+
+def _precompile_faction(faction_name: str, aor_name: str | None, data_path: str) -> PrecompileResult:
+    """
+    Helper run in the worker processes to parse and cache a single faction.
+    """
+    start = time.perf_counter()
+    try:
+        faction = parse_files_for_faction(faction_name, aor_name, data_path)
+    except Exception as e:
+        return PrecompileResult(faction_name, aor_name, round(time.perf_counter() - start, 3), error=f"{type(e).__name__}: {e}")
+
+    abilities = (
+        len(faction.battle_traits)
+        + len(faction.battle_formations or {})
+        + sum(len(enhancements) for enhancements in faction.enhancements_available.values())
+        + sum(len(lore) for lore in faction.lores_available.values())
+        + sum(len(unit.abilities) for unit in faction.units)
+    )
+
+    return PrecompileResult(
+        faction_name,
+        aor_name,
+        round(time.perf_counter() - start, 3),
+        len(faction.units),
+        abilities,
+        sum(len(unit.weapons) for unit in faction.units)
+    )
+
+
+def _write_report(data_path: Path, report: PrecompileReport):
+    """
+    Helper to write the report of a sweep to the data directory.
+    """
+    path = data_path / PRECOMPILE_REPORT_FILE_NAME
+    try:
+        path.write_text(report.to_json(), encoding="utf-8")
+    except OSError as e:
+        logger.warning("Failed to write precompile report %s: %s", path, e)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Parse all downloaded factions and fill the faction cache.")
+    arg_parser.add_argument("data_path", nargs="?", default=f"{DEFAULT_BASE_DIR}/data", help="the data directory")
+    arg_parser.add_argument("--workers", type=int, default=None, help="the number of processes, defaults to the number of CPUs")
+    args = arg_parser.parse_args()
+
+    sweep = precompile_factions(args.data_path, args.workers)
+    for failed in sweep.failed:
+        print(f"FAILED {failed.faction} - {failed.army_of_renown}: {failed.error}")
+    print(f"Precompiled {len(sweep.results)} factions in {sweep.seconds:.1f} s, {len(sweep.failed)} failed, report at {Path(args.data_path) / PRECOMPILE_REPORT_FILE_NAME}")
+    raise SystemExit(1 if sweep.failed else 0)
@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+
+from .data_sources import DataSource, get_data_source, set_data_source
+from .catalogue_storage import is_compressed_storage, set_compressed_storage
+from .github_downloader import get_download_workers, set_download_workers
+
+
+@dataclass(frozen=True)
+class DataSettings:
+    """
+    Module level settings of data loading, passed to spawned worker processes which start with the defaults.
+    Has attributes data_source: DataSource, compressed_storage: bool, download_workers: int
+    """
+    data_source: DataSource
+    compressed_storage: bool
+    download_workers: int
+
+
+def get_data_settings() -> DataSettings:
+    """
+    Gets the data loading settings of the current process.
+    :return: the DataSettings
+    """
+    return DataSettings(get_data_source(), is_compressed_storage(), get_download_workers())
+
+
+def apply_data_settings(settings: DataSettings):
+    """
+    Applies data loading settings to the current process, e.g. as initializer of a process pool.
+    :param settings: the DataSettings to apply
+    """
+    set_data_source(settings.data_source)
+    set_compressed_storage(settings.compressed_storage)
+    set_download_workers(settings.download_workers)
@@ -1,7 +1,15 @@
 from pathlib import Path
+from typing import Callable
 
 from src.constants import DEFAULT_BASE_DIR
-from src.data_loading.github_downloader import download_files_for_faction, download_all_faction_files, delete_all_faction_files, redownload_files
+from src.data_loading.constants import DEFAULT_DOWNLOAD_WORKERS
+from src.data_loading.github_downloader import download_files_for_faction, download_all_faction_files, delete_all_faction_files, redownload_files, sync_files, set_download_workers, DownloadProgress, SyncResult
+from src.data_loading.data_sources import create_data_source, get_data_source, set_data_source, TreeUnavailableError
+from src.data_loading.catalogue_storage import set_compressed_storage, find_catalogue
+from src.data_loading.precompile import precompile_factions, PrecompileReport
+from src.logging_config import get_logger_for_package
+
+logger = get_logger_for_package(__package__.split('.')[-2])
 
 class DownloadService:
     """
@@ -9,6 +17,9 @@ class DownloadService:
     """
     def __init__(self):
         self._download_dir: Path = Path(f"{DEFAULT_BASE_DIR}/data")
+        self._max_workers: int = DEFAULT_DOWNLOAD_WORKERS
+        self._use_archive: bool = False
+        self._archive_source: str | None = None
 
     def change_download_dir(self, download_dir: str | Path):
         """
@@ -17,19 +28,81 @@ class DownloadService:
         """
         self._download_dir = Path(download_dir)
 
-    def refresh_all_files_present(self) -> list[Path]:
+    def change_data_source(self, source_type: str, location: str | None = None, has_tree: bool = True, archive_url: str | None = None):
+        """
+        Sets the source all data is downloaded from.
+        :param source_type: The type of the source ("github", "mirror" or "local").
+        :param location: The base URL of a mirror or the directory of a local source (Optional for github, defaults to None).
+        :param has_tree: Whether a mirror serves a tree.json for incremental syncs (Optional, defaults to True).
+        :param archive_url: URL of a tarball of all files of a mirror (Optional, defaults to None).
+        """
+        set_data_source(create_data_source(source_type, location, has_tree, archive_url))
+
+    def change_max_workers(self, max_workers: int):
+        """
+        Sets the maximum number of concurrent downloads, also used by downloads started when parsing a faction with missing files.
+        :param max_workers: The new maximum, values below 1 are treated as 1.
+        """
+        self._max_workers = max(1, int(max_workers))
+        set_download_workers(self._max_workers)
+
+    def change_archive_download(self, use_archive: bool, archive_source: str | Path | None = None):
+        """
+        Sets whether downloading all files extracts them from a single repo archive.
+        :param use_archive: Whether to use the archive download.
+        :param archive_source: URL or local path of the archive, None for the upstream tarball (Optional, defaults to None).
+        """
+        self._use_archive = use_archive
+        self._archive_source = archive_source or None
+
+    def change_compression(self, compress: bool):
         """
-        Re-download all files currently downloaded in download_dir.
+        Sets whether catalogues are stored gzip compressed, files already present are converted when they are downloaded again.
+        :param compress: Whether to compress catalogues.
+        """
+        set_compressed_storage(compress)
+
+    def refresh_all_files_present(self, progress_callback: Callable[[DownloadProgress], None] | None = None) -> list[Path]:
+        """
+        Re-download all files currently downloaded in download_dir which changed upstream.
+        :param progress_callback: Called with a DownloadProgress while downloading (Optional, defaults to None).
         :return: List of paths to downloaded files.
         """
-        return redownload_files(self._download_dir)
+        if not get_data_source().supports_tree:
+            return redownload_files(self._download_dir, self._max_workers, progress_callback)
+
+        try:
+            result = sync_files(self._download_dir, include_new=False, max_workers=self._max_workers, progress_callback=progress_callback)
+        except TreeUnavailableError as e:
+            # e.g. a mirror configured with has_tree which does not serve a tree.json
+            logger.warning("%s, re-downloading changed files with conditional requests instead", e)
+            return redownload_files(self._download_dir, self._max_workers, progress_callback)
+        return [find_catalogue(self._download_dir, file) for file in result.changed if file not in result.failed]
+
+    def sync_all_files(self, prune: bool = False, progress_callback: Callable[[DownloadProgress], None] | None = None) -> SyncResult:
+        """
+        Download all files which are new or changed in the data repo.
+        :param prune: Whether to delete files which were removed from the data repo (Optional, defaults to False).
+        :param progress_callback: Called with a DownloadProgress while downloading (Optional, defaults to None).
+        :return: SyncResult describing the changes.
+        """
+        return sync_files(self._download_dir, prune=prune, max_workers=self._max_workers, progress_callback=progress_callback)
 
-    def download_all_files(self) -> list[Path]:
+    def download_all_files(self, progress_callback: Callable[[DownloadProgress], None] | None = None) -> list[Path]:
         """
         Download all files available in the data repo.
+        :param progress_callback: Called with a DownloadProgress while downloading (Optional, defaults to None).
         :return: List of paths to downloaded files.
         """
-        return download_all_faction_files(self._download_dir)
+        return download_all_faction_files(self._download_dir, self._max_workers, progress_callback, self._use_archive, self._archive_source)
+
+    def precompile_all_factions(self, progress_callback: Callable[[int, int], None] | None = None) -> PrecompileReport:
+        """
+        Parse all factions present in download_dir ahead of time, so that submitting a list never has to parse catalogues.
+        :param progress_callback: Called with the number of finished and total factions (Optional, defaults to None).
+        :return: PrecompileReport with parse times, object counts and failures, also written to download_dir.
+        """
+        return precompile_factions(self._download_dir, progress_callback=progress_callback)
 
     def download_faction_files(self, faction_name: str, aor_name: str | None=None) -> list[Path]:
         """
@@ -38,10 +111,10 @@ class DownloadService:
         :param aor_name: The name of the army of renown (Optional, defaults to None).
         :return: List of paths to downloaded files.
         """
-        return download_files_for_faction(faction_name, aor_name, self._download_dir)
+        return download_files_for_faction(faction_name, aor_name, self._download_dir, self._max_workers)
 
     def delete_all_files_present(self):
         """
         Delete all data files present in download_dir.
         """
-        delete_all_faction_files(self._download_dir)
\ No newline at end of file
+        delete_all_faction_files(self._download_dir)
@@ -1,17 +1,208 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from copy import copy
+from dataclasses import dataclass, fields, is_dataclass
 from pathlib import Path
 
 from src.constants import DEFAULT_BASE_DIR
 from src.classes import Faction
-from src.data_loading.faction_parser import parse_files_for_faction
+from src.data_loading.constants import DEFAULT_FACTION_CACHE_ENTRIES, DEFAULT_FACTION_CACHE_MEMORY_MB, MANIFEST_FILE_NAME, PROJECTION_ABILITIES, PROJECTION_STATS, PROJECTION_FULL
+from src.data_loading.faction_parser import parse_files_for_faction, read_file, add_regiments_of_renown
+from src.data_loading.process_settings import DataSettings, get_data_settings, apply_data_settings
+from src.logging_config import get_logger_for_package
+
+logger = get_logger_for_package(__package__.split('.')[-2])
+
+
+@dataclass(frozen=True)
+class FactionCacheStats:
+    """
+    Snapshot of the in-process faction cache, has attributes hits: int, misses: int, evictions: int, entries: int, memory: int
+    """
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    memory: int  # Approximate size of the cached factions in bytes
+
+
+@dataclass(frozen=True)
+class ParsingSettings:
+    """
+    Settings shared by all ParsingService instances and data loading, passed to spawned worker processes which start with the defaults.
+    Has attributes data: DataSettings, max_cache_entries: int, max_cache_memory: int, parallel_parsing: bool
+    """
+    data: DataSettings
+    max_cache_entries: int
+    max_cache_memory: int  # In bytes
+    parallel_parsing: bool
+
+
+class _FactionCache:
+    """
+    Thread-safe LRU cache of parsed factions, bounded by the number of entries and their approximate memory usage.
+    Entries are only returned while the signature of the files they were parsed from is unchanged.
+    """
+    def __init__(self, max_entries: int, max_memory: int):
+        """
+        Constructor.
+        :param max_entries: the maximum number of cached factions
+        :param max_memory: the maximum approximate size of all cached factions in bytes
+        """
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[tuple, Faction, int]] = OrderedDict()
+        self._max_entries = max_entries
+        self._max_memory = max_memory
+        self._memory = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: tuple, signature: tuple) -> Faction | None:
+        """
+        Gets a cached faction, marking it as recently used.
+        :param key: the key of the faction
+        :param signature: the current signature of the files of the faction
+        :return: the cached Faction, None if it is not cached or outdated
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, signature: tuple, faction: Faction):
+        """
+        Caches a faction, evicting the least recently used ones if the budgets are exceeded.
+        :param key: the key of the faction
+        :param signature: the signature of the files the faction was parsed from
+        :param faction: the parsed Faction
+        """
+        size = _approximate_size(faction)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self._max_memory or self._max_entries < 1:
+                logger.debug("Not caching faction %s of approximately %d bytes", faction.name, size)
+                return
+
+            self._entries[key] = (signature, faction, size)
+            self._memory += size
+            self._evict()
+
+    def configure(self, max_entries: int, max_memory: int):
+        """
+        Changes the budgets of the cache, evicting entries if necessary.
+        :param max_entries: the maximum number of cached factions
+        :param max_memory: the maximum approximate size of all cached factions in bytes
+        """
+        with self._lock:
+            self._max_entries = max_entries
+            self._max_memory = max_memory
+            self._evict()
+
+    def budgets(self) -> tuple[int, int]:
+        """
+        Get the budgets of the cache
+        :return: tuple of the maximum number of cached factions and their maximum approximate size in bytes
+        """
+        with self._lock:
+            return self._max_entries, self._max_memory
+
+    def clear(self):
+        """
+        Removes all cached factions.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+
+    def stats(self) -> FactionCacheStats:
+        """
+        Get a snapshot of the counters of the cache
+        :return: the FactionCacheStats
+        """
+        with self._lock:
+            return FactionCacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._memory)
+
+    def _evict(self):
+        """
+        Helper to evict the least recently used entries until the budgets are met, must be called while holding the lock.
+        """
+        while self._entries and (len(self._entries) > self._max_entries or self._memory > self._max_memory):
+            key = next(iter(self._entries))
+            logger.debug("Evicting faction %s from cache", key[1])
+            self._remove(key)
+            self._evictions += 1
+
+    def _remove(self, key: tuple):
+        """
+        Helper to remove an entry, must be called while holding the lock.
+        """
+        self._memory -= self._entries.pop(key)[2]
+
+
+def _approximate_size(obj, seen: set[int] | None = None) -> int:
+    """
+    Helper to approximate the memory used by a faction by summing the sizes of all objects reachable through dataclass fields and containers.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if is_dataclass(obj):
+        size += sum(_approximate_size(getattr(obj, f.name), seen) for f in fields(obj))
+    elif isinstance(obj, dict):
+        size += sum(_approximate_size(k, seen) + _approximate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_approximate_size(item, seen) for item in obj)
+
+    return size
+
+
+def _get_file_signature(files: tuple[Path | None, ...]) -> tuple:
+    """
+    Helper to get the modification time and size of each file, None for missing files.
+    """
+    signature = []
+    for file in files:
+        try:
+            stat = file.stat()
+            signature.append((str(file), stat.st_mtime_ns, stat.st_size))
+        except (AttributeError, OSError):
+            signature.append(None)
+
+    return tuple(signature)
+
 
 class ParsingService:
     """
     Interface for Parsing data files into Faction objects.
+    Parsed factions are shared between all instances through an in-process LRU cache.
     """
+    _cache = _FactionCache(DEFAULT_FACTION_CACHE_ENTRIES, DEFAULT_FACTION_CACHE_MEMORY_MB * 1024 * 1024)
+    # Parsing the files concurrently only pays off if there is more than one core to run on
+    _parallel_parsing = (os.cpu_count() or 1) > 1
+
     def __init__(self):
         self._faction: str | None = None
         self._army_of_renown: str | None = None
+        self._regiments_of_renown: list[str] = []
         self._data_location: str | Path = Path(f"{DEFAULT_BASE_DIR}/data")
+        self._use_cache: bool = True
+        self._lazy_units: bool = False
+        self._projection: str = PROJECTION_FULL
 
     def load_faction(self, faction: str):
         """
@@ -27,6 +218,13 @@ class ParsingService:
         """
         self._army_of_renown = army_of_renown
 
+    def load_regiments_of_renown(self, regiments_of_renown: list[str]):
+        """
+        Sets the regiment of renown names to parse later
+        :param regiments_of_renown: the names of the regiments of renown
+        """
+        self._regiments_of_renown = list(regiments_of_renown)
+
     def change_data_location(self, data_location: str | Path):
         """
         Sets the location of the data files to parse
@@ -34,9 +232,115 @@ class ParsingService:
         """
         self._data_location = Path(data_location)
 
+    def change_cache_usage(self, use_cache: bool):
+        """
+        Sets whether previously parsed factions are reused from the in-process cache and the cache in the data location
+        :param use_cache: whether to use the caches
+        """
+        self._use_cache = use_cache
+
+    def change_unit_loading(self, lazy: bool):
+        """
+        Sets whether units are only built when they are accessed, e.g. when only the units of a list are needed
+        :param lazy: whether to build units lazily
+        """
+        self._lazy_units = lazy
+
+    def change_projection(self, projection: str):
+        """
+        Sets which parts of the units are parsed, e.g. only abilities if weapons and characteristics are not needed
+        :param projection: one of PROJECTION_ABILITIES, PROJECTION_STATS or PROJECTION_FULL
+        """
+        if projection not in (PROJECTION_ABILITIES, PROJECTION_STATS, PROJECTION_FULL):
+            raise ValueError(f"Unknown projection {projection}")
+        self._projection = projection
+
+    @classmethod
+    def configure_faction_cache(cls, max_entries: int = DEFAULT_FACTION_CACHE_ENTRIES, max_memory_mb: int = DEFAULT_FACTION_CACHE_MEMORY_MB):
+        """
+        Sets the budgets of the in-process faction cache shared by all instances
+        :param max_entries: the maximum number of cached factions, 0 disables the cache (Optional, defaults to DEFAULT_FACTION_CACHE_ENTRIES)
+        :param max_memory_mb: the maximum approximate memory used by cached factions in MB (Optional, defaults to DEFAULT_FACTION_CACHE_MEMORY_MB)
+        """
+        cls._cache.configure(max(0, int(max_entries)), max(0, int(max_memory_mb)) * 1024 * 1024)
+
+    @classmethod
+    def configure_parallel_parsing(cls, parallel: bool):
+        """
+        Sets whether all instances parse the faction, lore and unit files of a faction concurrently or one after another
+        :param parallel: whether to parse the files concurrently
+        """
+        cls._parallel_parsing = parallel
+
+    @classmethod
+    def get_settings(cls) -> ParsingSettings:
+        """
+        Returns the settings shared by all instances, e.g. to pass them to worker processes
+        :return: ParsingSettings of the current process
+        """
+        return ParsingSettings(get_data_settings(), *cls._cache.budgets(), cls._parallel_parsing)
+
+    @classmethod
+    def apply_settings(cls, settings: ParsingSettings):
+        """
+        Applies settings returned by get_settings, e.g. as initializer of a process pool
+        :param settings: the ParsingSettings to apply
+        """
+        apply_data_settings(settings.data)
+        cls._cache.configure(settings.max_cache_entries, settings.max_cache_memory)
+        cls._parallel_parsing = settings.parallel_parsing
+
+    @classmethod
+    def get_faction_cache_stats(cls) -> FactionCacheStats:
+        """
+        Returns the counters of the in-process faction cache
+        :return: FactionCacheStats snapshot
+        """
+        return cls._cache.stats()
+
+    @classmethod
+    def clear_faction_cache(cls):
+        """
+        Removes all factions from the in-process faction cache
+        """
+        cls._cache.clear()
+
     def get_faction(self) -> Faction:
         """
-        Returns the parsed Faction object
+        Returns the parsed Faction object, reusing a cached one if the files it was parsed from did not change
         :return: Faction instance for the specified faction and army of renown
         """
-        return parse_files_for_faction(self._faction, self._army_of_renown, self._data_location)
\ No newline at end of file
+        if not self._use_cache:
+            return parse_files_for_faction(self._faction, self._army_of_renown, self._data_location, False, self._lazy_units, self._regiments_of_renown,
+                                           self._parallel_parsing, self._projection)
+
+        # Lazily built factions and projections are cached separately, so callers asking for all units get a complete faction
+        key = (Path(self._data_location).resolve(), self._faction, self._army_of_renown, self._lazy_units, tuple(self._regiments_of_renown), self._projection)
+        signature = self._get_signature()
+        if (faction := self._cache.get(key, signature)) is not None:
+            logger.debug("Using faction %s - %s from memory", self._faction, self._army_of_renown)
+            return faction
+
+        if self._regiments_of_renown:
+            # Regiments are added to the faction parsed without them, so lists with different regiments share one parsed faction
+            without_regiments = copy(self)
+            without_regiments._regiments_of_renown = []
+            faction = add_regiments_of_renown(without_regiments.get_faction(), self._regiments_of_renown, self._data_location)
+        else:
+            faction = parse_files_for_faction(self._faction, self._army_of_renown, self._data_location, lazy_units=self._lazy_units,
+                                              parallel=self._parallel_parsing, projection=self._projection)
+        # Missing files may have been downloaded, so the signature has to be taken again
+        self._cache.put(key, self._get_signature(), faction)
+
+        return faction
+
+    def _get_signature(self) -> tuple:
+        """
+        Helper to get the signature of the files the faction is parsed from.
+        """
+        files = read_file(self._faction, self._army_of_renown, self._data_location)
+        if self._regiments_of_renown:
+            # Regiments depend on other catalogues, any download or deletion updates the manifest
+            files += (Path(self._data_location) / MANIFEST_FILE_NAME,)
+
+        return _get_file_signature(files)
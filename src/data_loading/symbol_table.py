@@ -0,0 +1,125 @@
+from lxml import etree
+
+from src.logging_config import get_logger_for_package
+
+logger = get_logger_for_package(__package__.split('.')[-1])
+
+LINK_TAGS = ("infoLink", "entryLink", "catalogueLink")
+
+
+class CatalogueSymbolTable:
+    """
+    Index of the elements of loaded catalogues by id and by tag and name, used to resolve links between elements.
+    Elements can be registered incrementally, e.g. while a catalogue is streamed.
+    """
+    def __init__(self):
+        self._by_id: dict[str, etree._Element] = {}
+        self._by_name: dict[tuple[str, str], list[etree._Element]] = {}
+
+    @classmethod
+    def from_catalogues(cls, *roots) -> "CatalogueSymbolTable":
+        """
+        Builds a symbol table of all elements of the given catalogues.
+        :param roots: the xml root elements of the catalogues
+        :return: the CatalogueSymbolTable
+        """
+        symbols = cls()
+        for root in roots:
+            symbols.register(root)
+
+        return symbols
+
+    def register(self, element):
+        """
+        Registers an element and all its descendants having an id or a name, in document order.
+        Ids registered first take precedence, as in a catalogue an id is only defined once.
+        :param element: the xml element
+        """
+        for child in element.iter():
+            if not isinstance(child.tag, str):
+                # Comments and processing instructions
+                continue
+
+            if (element_id := child.get("id")) is not None:
+                self._by_id.setdefault(element_id, child)
+            if (name := child.get("name")) is not None:
+                self._by_name.setdefault((_localname(child), name), []).append(child)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, element_id: str | None):
+        """
+        Get an element by id
+        :param element_id: the id
+        :return: the xml element, None if the id is unknown
+        """
+        return self._by_id.get(element_id) if element_id is not None else None
+
+    def find(self, tag: str, name: str, parent_tag: str | None = None) -> list:
+        """
+        Get the elements with the given tag and name
+        :param tag: the tag without namespace, e.g. "profile"
+        :param name: the value of the name attribute
+        :param parent_tag: only return elements whose parent has this tag without namespace, e.g. "sharedProfiles" (Optional, defaults to None)
+        :return: list of matching xml elements in registration order
+        """
+        return [element for element in self._by_name.get((tag, name), []) if self._has_parent(element, parent_tag)]
+
+    def resolve_link(self, link):
+        """
+        Follows an infoLink, entryLink or catalogueLink to the element it points to, following chains of links.
+        :param link: the xml link element
+        :return: the xml element the link resolves to, None if it cannot be resolved
+        """
+        return self.resolve(link.get("targetId"))
+
+    def resolve(self, target_id: str | None):
+        """
+        Get the element a target id points to, following chains of links.
+        :param target_id: the target id of a link
+        :return: the xml element, None if it cannot be resolved
+        """
+        seen = set()
+        target = self.get(target_id)
+        while target is not None and _localname(target) in LINK_TAGS:
+            if target_id in seen:
+                logger.warning("Found cyclic link while resolving %s", target_id)
+                return None
+            seen.add(target_id)
+            target_id = target.get("targetId")
+            target = self.get(target_id)
+
+        return target
+
+    def resolve_profile(self, target_id: str | None, name: str | None, parent_tag: str | None = None):
+        """
+        Resolves a link to a profile, by target id or, for links to something else, by name.
+        :param target_id: the target id of the link
+        :param name: the name of the link
+        :param parent_tag: only accept profiles whose parent has this tag without namespace, e.g. "sharedProfiles" (Optional, defaults to None)
+        :return: the xml profile element, None if no profile matches
+        """
+        target = self.resolve(target_id)
+        if target is not None and _localname(target) == "profile" and self._has_parent(target, parent_tag):
+            return target
+
+        profiles = self.find("profile", name, parent_tag) if name is not None else []
+        return profiles[0] if profiles else None
+
+    @staticmethod
+    def _has_parent(element, parent_tag: str | None) -> bool:
+        """
+        Helper to check the tag of the parent of an element, True if no tag is required.
+        """
+        if parent_tag is None:
+            return True
+
+        return (parent := element.getparent()) is not None and _localname(parent) == parent_tag
+
+
+def _localname(element) -> str:
+    """
+    Helper to get the tag of an element without namespace.
+    """
+    return element.tag.rpartition("}")[2]
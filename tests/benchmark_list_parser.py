@@ -0,0 +1,31 @@
+"""
+Measures the throughput of get_list_as_dict over the golden list export corpus.
+Run from the repository root: python -m tests.benchmark_list_parser [--repeat N]
+"""
+import argparse
+import logging
+import time
+
+from tests.test_list_parser_golden import load_corpus, list_as_dict_or_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the throughput of get_list_as_dict")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs over the corpus, the fastest is reported")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    texts = list(load_corpus().values())
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for text in texts:
+            list_as_dict_or_error(text)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{len(texts)} lists in {best * 1000:.1f} ms, {len(texts) / best:.0f} lists/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Records the expected get_list_as_dict output of the list export corpus, e.g. after adding exports to tests/data/list_exports.
+The output is recorded with the list parser of a git revision, by default the one before the single-pass normalizer,
+so that new exports are checked against the original behaviour instead of the current one.
+Run from the repository root: python -m tests.record_list_exports [--revision REV]
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import subprocess
+import sys
+
+from tests.test_list_parser_golden import EXPECTED_OUTPUT, load_corpus
+
+BASELINE_REVISION = "269767b"  # Parent of the commit replacing _norm_list_text with a single scan
+
+
+def load_list_parser(revision: str):
+    """
+    Loads src/core/list_parser.py of a git revision as a module, resolving its imports against the current tree.
+    :param revision: the git revision
+    :return: the module
+    """
+    source = subprocess.run(["git", "show", f"{revision}:src/core/list_parser.py"], capture_output=True, text=True, check=True).stdout
+    spec = importlib.util.spec_from_loader("src.core.recorded_list_parser", loader=None)
+    module = importlib.util.module_from_spec(spec)
+    module.__package__ = "src.core"
+    exec(compile(source, f"{revision}:src/core/list_parser.py", "exec"), module.__dict__)
+
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Records the expected output of the list export corpus")
+    parser.add_argument("--revision", default=BASELINE_REVISION, help="git revision of the list parser to record the output of")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    list_parser = load_list_parser(args.revision)
+
+    expected = {}
+    for name, text in load_corpus().items():
+        try:
+            expected[name] = list_parser.get_list_as_dict(text)
+        except Exception as e:
+            expected[name] = {"error": type(e).__name__}
+
+    with open(EXPECTED_OUTPUT, "w", encoding="utf-8") as file:
+        json.dump(expected, file, indent=1, ensure_ascii=False)
+
+    print(f"Recorded {len(expected)} lists with the list parser of {args.revision}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
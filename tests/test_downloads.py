@@ -0,0 +1,159 @@
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import requests
+
+from src.data_loading.catalogue_storage import is_compressed_storage, set_compressed_storage
+from src.data_loading.constants import PARTIAL_DOWNLOAD_SUFFIX
+from src.data_loading.data_sources import LocalDataSource, LocalFileAdapter, get_data_source, set_data_source, git_blob_sha
+from src.data_loading.download_metadata import DownloadMetadata
+from src.data_loading.github_downloader import download_files, get_session
+
+CATALOGUE = Path(__file__).parent / "data" / "catalogues" / "Test Faction - Library.cat"
+FILE = CATALOGUE.name
+PART_FILE = FILE + PARTIAL_DOWNLOAD_SUFFIX
+
+
+class _InterruptedStream(io.RawIOBase):
+    """
+    Response body which fails like a dropped connection after a number of bytes.
+    """
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            self._raw.close()
+            raise requests.exceptions.ConnectionError("connection dropped")
+
+        data = self._raw.read(self._remaining if size < 0 else min(size, self._remaining))
+        self._remaining -= len(data)
+        return data
+
+
+class _RecordingAdapter(LocalFileAdapter):
+    """
+    LocalFileAdapter recording the Range header and status of every request, which can interrupt or truncate the next response body.
+    """
+    def __init__(self):
+        super().__init__()
+        self.requests: list[tuple[str | None, int]] = []
+        self.interrupt_after: int | None = None
+        self.truncate_to: int | None = None
+
+    def send(self, request, *args, **kwargs):
+        response = super().send(request, *args, **kwargs)
+        self.requests.append((request.headers.get("Range"), response.status_code))
+
+        if self.interrupt_after is not None:
+            response.raw = _InterruptedStream(response.raw, self.interrupt_after)
+            self.interrupt_after = None
+        elif self.truncate_to is not None:
+            # Content-Length still announces the complete file
+            body = response.raw.read(self.truncate_to)
+            response.raw.close()
+            response.raw = io.BytesIO(body)
+            self.truncate_to = None
+
+        return response
+
+
+class PartialDownloadTest(unittest.TestCase):
+    """
+    Tests resuming and verifying downloads against a local data source, whose file:// adapter supports ETag and Range requests
+    """
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.upstream = Path(self._tmp_dir.name) / "upstream"
+        self.data_dir = Path(self._tmp_dir.name) / "data"
+        self.upstream.mkdir()
+        shutil.copy(CATALOGUE, self.upstream / FILE)
+
+        self._previous_source = get_data_source()
+        self._previous_compression = is_compressed_storage()
+        set_data_source(LocalDataSource(self.upstream))
+        set_compressed_storage(False)
+
+        self.adapter = _RecordingAdapter()
+        get_session().mount("file://", self.adapter)
+
+    def tearDown(self):
+        get_session().mount("file://", LocalFileAdapter())
+        set_data_source(self._previous_source)
+        set_compressed_storage(self._previous_compression)
+        self._tmp_dir.cleanup()
+
+    def _interrupted_download(self, limit: int = 4096):
+        """
+        Helper to leave a partial download of limit bytes behind.
+        """
+        self.adapter.interrupt_after = limit
+        self.assertEqual(download_files([FILE], self.data_dir), [])
+        self.assertEqual((self.data_dir / PART_FILE).stat().st_size, limit)
+        self.adapter.requests.clear()
+
+    def test_interrupt_leaves_no_final_file(self):
+        self._interrupted_download()
+
+        self.assertFalse((self.data_dir / FILE).exists())
+        # The validator is known before the first byte is written, so the partial file can be resumed
+        self.assertIsNotNone(DownloadMetadata(self.data_dir).range_validator(PART_FILE))
+
+    def test_resume_on_206(self):
+        self._interrupted_download()
+
+        self.assertEqual(download_files([FILE], self.data_dir), [self.data_dir / FILE])
+        self.assertEqual(self.adapter.requests, [("bytes=4096-", 206)])
+        self.assertEqual((self.data_dir / FILE).read_bytes(), CATALOGUE.read_bytes())
+        self.assertFalse((self.data_dir / PART_FILE).exists())
+
+    def test_restart_on_200_if_file_changed(self):
+        self._interrupted_download()
+        changed = b"<!-- changed upstream -->\n" + CATALOGUE.read_bytes()
+        (self.upstream / FILE).write_bytes(changed)
+
+        self.assertEqual(download_files([FILE], self.data_dir), [self.data_dir / FILE])
+        self.assertEqual(self.adapter.requests, [("bytes=4096-", 200)])
+        self.assertEqual((self.data_dir / FILE).read_bytes(), changed)
+
+    def test_restart_on_416(self):
+        self._interrupted_download()
+        with open(self.data_dir / PART_FILE, "ab") as f:
+            f.write(b"\0" * CATALOGUE.stat().st_size)
+
+        self.assertEqual(download_files([FILE], self.data_dir), [self.data_dir / FILE])
+        self.assertEqual(self.adapter.requests, [(f"bytes={4096 + CATALOGUE.stat().st_size}-", 416), (None, 200)])
+        self.assertEqual((self.data_dir / FILE).read_bytes(), CATALOGUE.read_bytes())
+
+    def test_restart_without_validator(self):
+        self.data_dir.mkdir()
+        (self.data_dir / PART_FILE).write_bytes(b"stale partial download")
+
+        self.assertEqual(download_files([FILE], self.data_dir), [self.data_dir / FILE])
+        self.assertEqual(self.adapter.requests, [(None, 200)])
+        self.assertEqual((self.data_dir / FILE).read_bytes(), CATALOGUE.read_bytes())
+
+    def test_length_verification_failure(self):
+        self.adapter.truncate_to = 4096
+
+        self.assertEqual(download_files([FILE], self.data_dir), [])
+        self.assertFalse((self.data_dir / FILE).exists())
+        self.assertFalse((self.data_dir / PART_FILE).exists())
+
+    def test_hash_verification(self):
+        self.assertEqual(download_files([FILE], self.data_dir, expected_shas={FILE: "0" * 40}), [])
+        self.assertFalse((self.data_dir / FILE).exists())
+        self.assertFalse((self.data_dir / PART_FILE).exists())
+
+        self.assertEqual(download_files([FILE], self.data_dir, expected_shas={FILE: git_blob_sha(CATALOGUE)}), [self.data_dir / FILE])
+
+
+if __name__ == "__main__":
+    unittest.main()
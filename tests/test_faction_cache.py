@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.classes import Faction, Unit
+from src.data_loading.services.parsing_service import FactionCacheStats, _FactionCache, _approximate_size, _get_file_signature
+
+SIGNATURE = (("Faction.cat", 1, 100),)
+
+
+def make_faction(name: str, unit_count: int = 3) -> Faction:
+    """
+    Creates a faction with a number of units without weapons and abilities.
+    """
+    return Faction(name, [], None, {}, {}, [Unit(f"{name} Unit {idx}", '5"', "5", "2", None, "3+", None, [], []) for idx in range(unit_count)])
+
+
+def make_key(name: str) -> tuple:
+    """
+    Creates a key like the ones of ParsingService.
+    """
+    return (Path("data"), name, None, False, (), "full")
+
+
+class FactionCacheTest(unittest.TestCase):
+    """
+    Tests the budgets, counters and invalidation of the in-process faction cache
+    """
+    def test_hits_and_misses(self):
+        cache = _FactionCache(4, 1024 * 1024)
+        faction = make_faction("Stormcast Eternals")
+
+        self.assertIsNone(cache.get(make_key(faction.name), SIGNATURE))
+        cache.put(make_key(faction.name), SIGNATURE, faction)
+        self.assertIs(cache.get(make_key(faction.name), SIGNATURE), faction)
+        self.assertIs(cache.get(make_key(faction.name), SIGNATURE), faction)
+
+        self.assertEqual(cache.stats(), FactionCacheStats(2, 1, 0, 1, _approximate_size(faction)))
+
+    def test_eviction_by_entry_count(self):
+        cache = _FactionCache(2, 1024 * 1024)
+        for name in ["Skaven", "Seraphon", "Sylvaneth"]:
+            cache.put(make_key(name), SIGNATURE, make_faction(name))
+
+        self.assertIsNone(cache.get(make_key("Skaven"), SIGNATURE))
+        self.assertIsNotNone(cache.get(make_key("Seraphon"), SIGNATURE))
+        self.assertIsNotNone(cache.get(make_key("Sylvaneth"), SIGNATURE))
+        stats = cache.stats()
+        self.assertEqual((stats.evictions, stats.entries), (1, 2))
+
+    def test_eviction_is_least_recently_used(self):
+        cache = _FactionCache(2, 1024 * 1024)
+        cache.put(make_key("Skaven"), SIGNATURE, make_faction("Skaven"))
+        cache.put(make_key("Seraphon"), SIGNATURE, make_faction("Seraphon"))
+        cache.get(make_key("Skaven"), SIGNATURE)
+        cache.put(make_key("Sylvaneth"), SIGNATURE, make_faction("Sylvaneth"))
+
+        self.assertIsNotNone(cache.get(make_key("Skaven"), SIGNATURE))
+        self.assertIsNone(cache.get(make_key("Seraphon"), SIGNATURE))
+
+    def test_eviction_by_memory(self):
+        small, large = make_faction("Skaven", 2), make_faction("Seraphon", 20)
+        cache = _FactionCache(10, _approximate_size(small) + _approximate_size(large) - 1)
+        cache.put(make_key(small.name), SIGNATURE, small)
+        cache.put(make_key(large.name), SIGNATURE, large)
+
+        self.assertIsNone(cache.get(make_key(small.name), SIGNATURE))
+        self.assertIs(cache.get(make_key(large.name), SIGNATURE), large)
+        self.assertEqual(cache.stats(), FactionCacheStats(1, 1, 1, 1, _approximate_size(large)))
+
+    def test_factions_over_memory_budget_are_not_cached(self):
+        faction = make_faction("Skaven")
+        cache = _FactionCache(10, _approximate_size(faction) - 1)
+        cache.put(make_key(faction.name), SIGNATURE, faction)
+
+        self.assertIsNone(cache.get(make_key(faction.name), SIGNATURE))
+        self.assertEqual(cache.stats(), FactionCacheStats(0, 1, 0, 0, 0))
+
+    def test_configure_evicts(self):
+        cache = _FactionCache(3, 1024 * 1024)
+        for name in ["Skaven", "Seraphon", "Sylvaneth"]:
+            cache.put(make_key(name), SIGNATURE, make_faction(name))
+
+        cache.configure(1, 1024 * 1024)
+        self.assertEqual(cache.budgets(), (1, 1024 * 1024))
+        self.assertEqual((cache.stats().evictions, cache.stats().entries), (2, 1))
+
+        # A cache without entries caches nothing
+        cache.configure(0, 1024 * 1024)
+        cache.put(make_key("Skaven"), SIGNATURE, make_faction("Skaven"))
+        self.assertEqual(cache.stats().entries, 0)
+
+    def test_replacing_an_entry_keeps_memory(self):
+        cache = _FactionCache(3, 1024 * 1024)
+        cache.put(make_key("Skaven"), SIGNATURE, make_faction("Skaven", 10))
+        faction = make_faction("Skaven")
+        cache.put(make_key("Skaven"), SIGNATURE, faction)
+
+        self.assertEqual(cache.stats(), FactionCacheStats(0, 0, 0, 1, _approximate_size(faction)))
+
+    def test_changed_signature_invalidates(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file = Path(tmp_dir) / "Skaven.cat"
+            file.write_text("<catalogue/>")
+            missing = Path(tmp_dir) / "Skaven - Library.cat"
+            signature = _get_file_signature((file, missing, None))
+            self.assertEqual(signature[1:], (None, None))
+
+            cache = _FactionCache(3, 1024 * 1024)
+            faction = make_faction("Skaven")
+            cache.put(make_key(faction.name), signature, faction)
+            self.assertIs(cache.get(make_key(faction.name), _get_file_signature((file, missing, None))), faction)
+
+            changes = {
+                "modified": lambda: os.utime(file, ns=(0, 0)),
+                "resized": lambda: file.write_text("<catalogue></catalogue>"),
+                "created": lambda: missing.write_text("<catalogue/>"),
+            }
+            for description, change in changes.items():
+                with self.subTest(change=description):
+                    cache.put(make_key(faction.name), signature, faction)
+                    change()
+                    new_signature = _get_file_signature((file, missing, None))
+                    self.assertNotEqual(new_signature, signature)
+
+                    self.assertIsNone(cache.get(make_key(faction.name), new_signature))
+                    # The outdated entry is removed instead of being kept until it is evicted
+                    self.assertEqual((cache.stats().entries, cache.stats().memory), (0, 0))
+                    signature = new_signature
+
+    def test_clear(self):
+        cache = _FactionCache(3, 1024 * 1024)
+        cache.put(make_key("Skaven"), SIGNATURE, make_faction("Skaven"))
+        cache.clear()
+
+        self.assertIsNone(cache.get(make_key("Skaven"), SIGNATURE))
+        self.assertEqual((cache.stats().entries, cache.stats().memory), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import unittest
+from pathlib import Path
+
+from src.core.list_parser import get_list_as_dict
+
+DATA_DIR = Path(__file__).parent / "data"
+EXPORTS_DIR = DATA_DIR / "list_exports"
+FUZZED_EXPORTS = DATA_DIR / "list_exports_fuzzed.json"
+EXPECTED_OUTPUT = DATA_DIR / "list_exports_expected.json"
+
+
+def load_corpus() -> dict[str, str]:
+    """
+    Loads the list exports, the exported files by file name and the fuzzed variants as "fuzzed/<index>".
+    :return: dict of the list texts by name
+    """
+    corpus = {}
+    for path in sorted(EXPORTS_DIR.glob("*.txt")):
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            corpus[path.name] = file.read()
+
+    with open(FUZZED_EXPORTS, "r", encoding="utf-8") as file:
+        for idx, text in enumerate(json.load(file)):
+            corpus[f"fuzzed/{idx}"] = text
+
+    return corpus
+
+
+def list_as_dict_or_error(text: str) -> dict:
+    """
+    Gets the output of get_list_as_dict, or the type of the raised exception as {"error": <type name>}.
+    """
+    try:
+        return get_list_as_dict(text)
+    except Exception as e:
+        return {"error": type(e).__name__}
+
+
+class ListParserGoldenTest(unittest.TestCase):
+    """
+    Compares get_list_as_dict against the output recorded before the list text was split with precompiled patterns
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = load_corpus()
+        with open(EXPECTED_OUTPUT, "r", encoding="utf-8") as file:
+            cls.expected = json.load(file)
+
+    def test_corpus_matches_expected(self):
+        self.assertEqual(set(self.corpus), set(self.expected))
+
+    def test_get_list_as_dict(self):
+        for name, text in self.corpus.items():
+            with self.subTest(name):
+                self.assertEqual(list_as_dict_or_error(text), self.expected[name])
+
+
+if __name__ == "__main__":
+    unittest.main()
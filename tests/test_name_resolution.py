@@ -0,0 +1,144 @@
+import unittest
+from pathlib import Path
+
+from src.classes import Ability, Faction, NameResolution, TrigramIndex, Unit
+from src.core.constants import NAME_MATCH_THRESHOLD
+from src.core.list_parser import get_enhancement_unit_dict, get_list_as_dict, get_unit_objects
+
+SCOURGE_EXPORT = Path(__file__).parent / "data" / "list_exports" / "app_scourge_of_ghyran.txt"
+
+
+def make_unit(name: str) -> Unit:
+    """
+    Creates a unit without weapons and abilities.
+    """
+    return Unit(name, '5"', "5", "2", None, "3+", None, [], [])
+
+
+def make_enhancement(name: str) -> Ability:
+    """
+    Creates an enhancement ability.
+    """
+    return Ability(name, "Passive", None, None, None, "Effect", None)
+
+
+def make_faction(unit_names: list[str], enhancement_names: list[str] = ()) -> Faction:
+    """
+    Creates a faction with the given units and one table of the given enhancements.
+    """
+    return Faction("Stormcast Eternals", [], None, {"Heroic Traits": [make_enhancement(name) for name in enhancement_names]}, {}, [make_unit(name) for name in unit_names])
+
+
+class TrigramIndexTest(unittest.TestCase):
+    """
+    Tests finding the most similar name with the trigram index
+    """
+    def setUp(self):
+        self.index = TrigramIndex(["Lord-Celestant", "Liberators", "Yndrasta, the Celestial Spear", "Liberators"])
+
+    def test_duplicates_are_indexed_once(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_punctuation_and_case_are_ignored(self):
+        self.assertEqual(self.index.best_match("lord celestant", NAME_MATCH_THRESHOLD), ("Lord-Celestant", 1.0))
+
+    def test_near_miss(self):
+        for name, expected in [("Liberaters", "Liberators"), ("Yndrasta the Celestial Speer", "Yndrasta, the Celestial Spear"), ("Lord Celestent", "Lord-Celestant")]:
+            with self.subTest(name=name):
+                resolved, score = self.index.best_match(name, NAME_MATCH_THRESHOLD)
+                self.assertEqual(resolved, expected)
+                self.assertGreaterEqual(score, NAME_MATCH_THRESHOLD)
+                self.assertLess(score, 1.0)
+
+    def test_rejected_below_threshold(self):
+        for name in ["Clanrats", "Celestant Prime", "Lord"]:
+            with self.subTest(name=name):
+                match = self.index.best_match(name, 0.0)
+                if match is not None:
+                    self.assertLess(match[1], NAME_MATCH_THRESHOLD)
+                self.assertIsNone(self.index.best_match(name, NAME_MATCH_THRESHOLD))
+
+    def test_names_without_trigrams(self):
+        self.assertIsNone(self.index.best_match("", 0.0))
+        self.assertIsNone(self.index.best_match(" - ", 0.0))
+
+    def test_ties_prefer_names_indexed_first(self):
+        # Both names have the same trigrams
+        for names in [["Lord-Celestant", "Lord Celestant"], ["Lord Celestant", "Lord-Celestant"]]:
+            with self.subTest(names=names):
+                self.assertEqual(TrigramIndex(names).best_match("Lord Celestent", NAME_MATCH_THRESHOLD)[0], names[0])
+
+
+class NameResolutionTest(unittest.TestCase):
+    """
+    Tests resolving unit and enhancement names of a list which are not found as is
+    """
+    def setUp(self):
+        self.faction = make_faction(["Lord-Celestant", "Liberators", "Knight-Questor", "Yndrasta, the Celestial Spear"], ["Warrior Indomitable", "Astral-Charged Aura"])
+
+    def test_units_found_as_is_are_not_reported(self):
+        resolutions = []
+        units = get_unit_objects(["Liberators", "lord-celestant & General"], self.faction, resolutions=resolutions)
+
+        self.assertEqual([unit.name for unit in units], ["Liberators", "Lord-Celestant"])
+        self.assertEqual(resolutions, [])
+
+    def test_near_miss_units_are_reported(self):
+        resolutions = []
+        units = get_unit_objects(["Liberaters", "Knight Questor & General"], self.faction, resolutions=resolutions)
+
+        self.assertEqual([unit.name for unit in units], ["Liberators", "Knight-Questor"])
+        self.assertEqual([(r.kind, r.requested, r.resolved) for r in resolutions], [("unit", "Liberaters", "Liberators"), ("unit", "Knight Questor", "Knight-Questor")])
+        for resolution in resolutions:
+            with self.subTest(requested=resolution.requested):
+                self.assertIsInstance(resolution, NameResolution)
+                self.assertGreaterEqual(resolution.score, NAME_MATCH_THRESHOLD)
+                self.assertEqual(resolution.score, round(resolution.score, 3))
+
+    def test_dissimilar_units_are_dropped(self):
+        resolutions = []
+
+        self.assertEqual(get_unit_objects(["Clanrats", "Liberators"], self.faction, resolutions=resolutions), [self.faction.units[1]])
+        self.assertEqual(resolutions, [])
+
+    def test_resolutions_are_optional(self):
+        self.assertEqual(get_unit_objects(["Liberaters"], self.faction), [self.faction.units[1]])
+
+    def test_repeated_near_miss_units_are_kept(self):
+        resolutions = []
+        units = get_unit_objects(["Knight Questor & General", "Knight Questor"], self.faction, resolutions=resolutions)
+
+        self.assertEqual([unit.name for unit in units], ["Knight-Questor", "Knight-Questor"])
+        self.assertEqual(len(resolutions), 2)
+
+    def test_alternate_warscroll_pair(self):
+        units = get_list_as_dict(SCOURGE_EXPORT.read_text(encoding="utf-8"))["units"]
+        # Each unit with an alternate warscroll is listed with the corrected name followed by the original one
+        self.assertEqual(len(units), 5)
+
+        for faction_names, expected_resolutions in [
+            # Found as is by the corrected name
+            (["Lord-Celestant", "Liberators (Scourge of Ghyran)", "Yndrasta, the Celestial Spear"], []),
+            # Found as is by the original name
+            (["Scourge of Ghyran Lord-Celestant", "Scourge of Ghyran Liberators", "Yndrasta, the Celestial Spear"], []),
+            # Neither name is found as is, so only the corrected name is resolved
+            (["Lord-Celestant", "Liberators (Scourge of Ghyren)", "Yndrasta, the Celestial Spear"], ["Liberators (Scourge of Ghyran)"]),
+        ]:
+            with self.subTest(faction_names=faction_names):
+                resolutions = []
+                found = get_unit_objects(units, make_faction(faction_names), resolutions=resolutions)
+
+                self.assertEqual([unit.name for unit in found], faction_names)
+                self.assertEqual([resolution.requested for resolution in resolutions], expected_resolutions)
+
+    def test_near_miss_enhancements_are_reported(self):
+        resolutions = []
+        enhancements = get_enhancement_unit_dict(["Lord-Celestant & General & Warrior Indomitible", "Liberators & Reinforced", "Knight-Questor & Astral Charged Aura"], self.faction, resolutions=resolutions)
+
+        self.assertEqual({unit: [e.name for e in found] for unit, found in enhancements.items()}, {"Lord-Celestant": ["Warrior Indomitable"], "Liberators": [], "Knight-Questor": ["Astral-Charged Aura"]})
+        # Unit modifiers are no enhancements, so they are not resolved
+        self.assertEqual([(r.kind, r.requested, r.resolved) for r in resolutions], [("enhancement", "Warrior Indomitible", "Warrior Indomitable"), ("enhancement", "Astral Charged Aura", "Astral-Charged Aura")])
+
+
+if __name__ == "__main__":
+    unittest.main()
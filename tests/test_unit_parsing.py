@@ -0,0 +1,111 @@
+import gzip
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data_loading.catalogue_storage import parse_catalogue
+from src.data_loading.constants import PROJECTION_ABILITIES, PROJECTION_STATS, PROJECTION_FULL
+from src.data_loading.faction_parser import get_units, stream_units, parse_units, index_units
+from src.data_loading.symbol_table import CatalogueSymbolTable
+
+CATALOGUE_DIR = Path(__file__).parent / "data" / "catalogues"
+# The shared profiles follow the shared selection entries in the first library and precede them in the second
+LIBRARIES = [CATALOGUE_DIR / "Test Faction - Library.cat", CATALOGUE_DIR / "Test Faction Profiles First - Library.cat"]
+PROJECTIONS = [PROJECTION_ABILITIES, PROJECTION_STATS, PROJECTION_FULL]
+NS = {'bs': 'http://www.battlescribe.net/schema/catalogueSchema'}
+
+
+def parse_units_from_tree(unit_file: Path, projection: str = PROJECTION_FULL) -> list:
+    """
+    Parses the units of a library with get_units from the whole tree, as the parser did before streaming.
+    """
+    unit_root = parse_catalogue(unit_file).getroot()
+    shared_sel_entries = unit_root.find("bs:sharedSelectionEntries", namespaces=NS)
+
+    return get_units(shared_sel_entries, CatalogueSymbolTable.from_catalogues(unit_root), NS, projection)
+
+
+class StreamUnitsTest(unittest.TestCase):
+    """
+    Compares the streaming unit parser against get_units on small fixture libraries
+    """
+    def test_matches_get_units(self):
+        for library in LIBRARIES:
+            for projection in PROJECTIONS:
+                with self.subTest(library=library.name, projection=projection):
+                    expected = parse_units_from_tree(library, projection)
+                    self.assertEqual(len(expected), 5)
+                    self.assertEqual(stream_units(library, NS, projection=projection), expected)
+
+    def test_parse_units_streams_by_default(self):
+        for library in LIBRARIES:
+            with self.subTest(library=library.name):
+                self.assertEqual(parse_units(library, NS), parse_units(library, NS, streaming=False))
+
+    def test_shared_profiles_are_resolved(self):
+        for library in LIBRARIES:
+            with self.subTest(library=library.name):
+                hero, _, manifestation, weapon_team, _ = stream_units(library, NS)
+                self.assertEqual([ability.name for ability in hero.abilities], ["Inspiring Presence", "Stormbound", "Heroic Leadership"])
+                self.assertEqual([ability.name for ability in weapon_team.abilities], ["Weapon Team"])
+                # Links to profiles which are not in the library are ignored
+                self.assertEqual([ability.name for ability in manifestation.abilities], ["Whirling Vortex"])
+
+    def test_entry_ids(self):
+        for library in LIBRARIES:
+            with self.subTest(library=library.name):
+                expected = parse_units_from_tree(library)
+                self.assertEqual(stream_units(library, NS, {"u-team", "u-hero", "unknown"}), [expected[0], expected[3]])
+
+    def test_compressed_library(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            compressed = Path(tmp_dir) / f"{LIBRARIES[0].name}.gz"
+            with open(LIBRARIES[0], "rb") as src, gzip.open(compressed, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+            self.assertEqual(stream_units(compressed, NS), parse_units_from_tree(LIBRARIES[0]))
+
+
+class LazyUnitListTest(unittest.TestCase):
+    """
+    Compares the lazily built units of index_units against eager parsing on small fixture libraries
+    """
+    def test_matches_eager_parsing(self):
+        for library in LIBRARIES:
+            for projection in PROJECTIONS:
+                with self.subTest(library=library.name, projection=projection):
+                    self.assertEqual(list(index_units(library, NS, projection)), parse_units_from_tree(library, projection))
+
+    def test_sequence_access(self):
+        expected = parse_units_from_tree(LIBRARIES[0])
+        units = index_units(LIBRARIES[0], NS)
+
+        self.assertEqual(len(units), len(expected))
+        self.assertEqual(units[1], expected[1])
+        self.assertEqual(units[-1], expected[-1])
+        self.assertEqual(units[1:4], expected[1:4])
+        self.assertEqual(units, expected)
+        with self.assertRaises(IndexError):
+            units[len(expected)]
+
+    def test_lookups_only_build_requested_units(self):
+        expected = parse_units_from_tree(LIBRARIES[0])
+        units = index_units(LIBRARIES[0], NS)
+
+        self.assertEqual(units.names, [unit.name for unit in expected])
+        self.assertEqual(units.find("Liberators"), [expected[1], expected[4]])
+        self.assertEqual(units.find("Unknown"), [])
+        self.assertEqual(units.get_by_id("u-team"), expected[3])
+        self.assertIsNone(units.get_by_id("unknown"))
+        self.assertEqual(repr(units), "LazyUnitList(5 units, 3 built)")
+
+    def test_units_are_built_once(self):
+        units = index_units(LIBRARIES[0], NS)
+
+        self.assertIs(units[0], units[0])
+        self.assertIs(units.get_by_id("u-hero"), units[0])
+
+
+if __name__ == "__main__":
+    unittest.main()